@@ -0,0 +1,96 @@
+import json
+
+from django.conf import settings
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import counters
+from posts.models import Group, Post, User
+from posts.tests import constants
+
+
+class ApiViewsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=constants.username)
+        cls.group = Group.objects.create(
+            title=constants.title,
+            slug=constants.slug,
+            description=constants.description,
+        )
+        Post.objects.bulk_create([Post(
+            text=f'{constants.text} {i}',
+            author=cls.user,
+            group=cls.group) for i in range(settings.PAGINATOR_PAGE + 2)])
+        # bulk_create не отправляет сигналы, счетчики пересчитываются.
+        counters.recount(cls.user.pk)
+        cls.post = Post.objects.first()
+        cls.post.comments.create(author=cls.user, text=constants.text_comment)
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_post_list_follows_cursor(self):
+        """Список постов листается по ссылке next."""
+        data = self.guest_client.get(reverse('api:post_list')).json()
+        self.assertEqual(len(data['results']), settings.PAGINATOR_PAGE)
+        self.assertIsNone(data['previous'])
+        data = self.guest_client.get(data['next']).json()
+        self.assertEqual(len(data['results']), 2)
+        self.assertIsNone(data['next'])
+
+    def test_next_link_keeps_filters(self):
+        """Ссылка next сохраняет фильтр по сообществу."""
+        Post.objects.create(text=constants.text_other, author=self.user)
+        data = self.guest_client.get(
+            reverse('api:post_list'),
+            {'group': constants.slug}
+        ).json()
+        self.assertIn(f'group={constants.slug}', data['next'])
+        data = self.guest_client.get(data['next']).json()
+        self.assertEqual(len(data['results']), 2)
+        self.assertEqual(
+            {post['group'] for post in data['results']},
+            {constants.slug}
+        )
+        self.assertIn(f'group={constants.slug}', data['previous'])
+
+    def test_detail_endpoints(self):
+        """Пост, сообщество, профиль и комментарии отдаются в JSON."""
+        post = self.guest_client.get(
+            reverse('api:post_detail', args=(self.post.pk,))
+        ).json()
+        self.assertEqual(post['author'], constants.username)
+        self.assertEqual(post['comment_count'], 1)
+        group = self.guest_client.get(
+            reverse('api:group_detail', args=(constants.slug,))
+        ).json()
+        self.assertEqual(group['title'], constants.title)
+        profile = self.guest_client.get(
+            reverse('api:profile_detail', args=(constants.username,))
+        ).json()
+        self.assertEqual(
+            profile['posts_count'],
+            settings.PAGINATOR_PAGE + 2
+        )
+        comments = self.guest_client.get(
+            reverse('api:comment_list', args=(self.post.pk,))
+        ).json()
+        self.assertEqual(
+            comments['results'][0]['text'],
+            constants.text_comment
+        )
+
+    def test_api_is_read_only(self):
+        """API не принимает запросы на запись."""
+        response = self.guest_client.post(reverse('api:post_list'))
+        self.assertEqual(response.status_code, 405)
+
+    def test_export_streams_every_post(self):
+        """Экспорт отдает по строке NDJSON на каждый пост."""
+        response = self.guest_client.get(reverse('api:post_export'))
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), Post.objects.count())
+        self.assertEqual(json.loads(lines[0])['group'], constants.slug)
@@ -0,0 +1,184 @@
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_GET
+
+from posts.counters import get_stats
+from posts.models import Comment, Group, Post
+from posts.paginator import get_page
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+def serialize_post(post):
+    return {
+        'id': post.pk,
+        'text': post.text,
+        'pub_date': post.pub_date.isoformat(),
+        'author': post.author.username,
+        'group': post.group.slug if post.group else None,
+        'image': post.image.url if post.image else None,
+        'comment_count': getattr(post, 'comment_count', None),
+    }
+
+
+def serialize_group(group):
+    return {
+        'id': group.pk,
+        'title': group.title,
+        'slug': group.slug,
+        'description': group.description,
+    }
+
+
+def serialize_comment(comment):
+    return {
+        'id': comment.pk,
+        'post': comment.post_id,
+        'author': comment.author.username,
+        'text': comment.text,
+        'created': comment.created.isoformat(),
+    }
+
+
+def page_link(request, key, cursor):
+    """Возвращает ссылку на соседнюю страницу с теми же фильтрами
+
+        Ключевые аргументы:
+        key -- after или before
+        cursor -- курсор соседней страницы
+        """
+    if not cursor:
+        return None
+    query = request.GET.copy()
+    query.pop('after', None)
+    query.pop('before', None)
+    query[key] = cursor
+    return f'{request.path}?{query.urlencode()}'
+
+
+def paginated(request, page, serialize):
+    """Возвращает страницу в JSON со ссылками на соседние страницы
+
+        Ключевые аргументы:
+        page -- страница KeysetPaginator
+        serialize -- функция, превращающая объект в словарь
+        """
+    paginator = page.paginator
+    return JsonResponse({
+        'results': [serialize(item) for item in page],
+        'next': page_link(request, 'after', paginator.next_cursor),
+        'previous': page_link(request, 'before', paginator.previous_cursor),
+    })
+
+
+@require_GET
+def post_list(request):
+    """Возвращает посты по курсору, можно отфильтровать по group и author
+
+        Ключевые аргументы:
+        group -- slug сообщества
+        author -- имя автора
+        """
+    post_list = Post.objects.for_feed()
+    if request.GET.get('group'):
+        post_list = post_list.filter(group__slug=request.GET['group'])
+    if request.GET.get('author'):
+        post_list = post_list.filter(
+            author__username=request.GET['author']
+        )
+    return paginated(request, get_page(request, post_list), serialize_post)
+
+
+@require_GET
+def post_detail(request, post_id):
+    post = get_object_or_404(Post.objects.for_feed(), pk=post_id)
+    return JsonResponse(serialize_post(post))
+
+
+@require_GET
+def comment_list(request, post_id):
+    get_object_or_404(Post, pk=post_id)
+    comments = Comment.objects.filter(
+        post_id=post_id
+    ).select_related('author')
+    page = get_page(request, comments, keys=('created', 'pk'))
+    return paginated(request, page, serialize_comment)
+
+
+@require_GET
+def group_list(request):
+    """Возвращает сообщества по id после курсора after
+
+        Ключевые аргументы:
+        after -- id последнего сообщества предыдущей страницы
+        """
+    groups = Group.objects.order_by('pk')
+    after = request.GET.get('after', '')
+    if after.isdigit():
+        groups = groups.filter(pk__gt=int(after))
+    groups = list(groups[:settings.PAGINATOR_PAGE + 1])
+    has_next = len(groups) > settings.PAGINATOR_PAGE
+    groups = groups[:settings.PAGINATOR_PAGE]
+    return JsonResponse({
+        'results': [serialize_group(group) for group in groups],
+        'next': page_link(
+            request,
+            'after',
+            groups[-1].pk if has_next else None
+        ),
+    })
+
+
+@require_GET
+def group_detail(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return JsonResponse(serialize_group(group))
+
+
+@require_GET
+def profile_detail(request, username):
+    User = get_user_model()
+    author = get_object_or_404(
+        User.objects.select_related('stats'),
+        username=username
+    )
+    stats = get_stats(author)
+    return JsonResponse({
+        'username': author.username,
+        'full_name': author.get_full_name(),
+        'posts_count': stats.posts_count,
+        'followers_count': stats.followers_count,
+        'following_count': stats.following_count,
+    })
+
+
+def export_lines():
+    posts = Post.objects.order_by('pk').values_list(
+        'pk', 'text', 'pub_date', 'author__username', 'group__slug', 'image'
+    )
+    for pk, text, pub_date, author, group, image in posts.iterator(
+        chunk_size=EXPORT_CHUNK_SIZE
+    ):
+        yield json.dumps({
+            'id': pk,
+            'text': text,
+            'pub_date': pub_date.isoformat(),
+            'author': author,
+            'group': group,
+            'image': f'{settings.MEDIA_URL}{image}' if image else None,
+        }, ensure_ascii=False) + '\n'
+
+
+@require_GET
+def post_export(request):
+    """Отдает все посты построчно в NDJSON, не загружая таблицу в память"""
+    response = StreamingHttpResponse(
+        export_lines(),
+        content_type='application/x-ndjson; charset=utf-8'
+    )
+    response['Content-Disposition'] = 'attachment; filename="posts.ndjson"'
+    return response
@@ -0,0 +1,10 @@
+import pytest
+from django.test import override_settings
+
+from yatube.testing import isolated_caches
+
+
+@pytest.fixture(scope='session', autouse=True)
+def isolated_cache():
+    with override_settings(CACHES=isolated_caches()):
+        yield
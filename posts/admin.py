@@ -1,6 +1,8 @@
 from django.contrib import admin
+from django.db.models.expressions import RawSQL
 
 from .models import Group, Post, Follow, Comment
+from .search import fts_enabled, matching_ids
 
 
 @admin.register(Post)
@@ -10,6 +12,14 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        sql, params = matching_ids(search_term)
+        if not fts_enabled() or not params[0]:
+            return super().get_search_results(
+                request, queryset, search_term
+            )
+        return queryset.filter(pk__in=RawSQL(sql, params)), False
+
 
 @admin.register(Group)
 class GroupAdmin(admin.ModelAdmin):
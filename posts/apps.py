@@ -3,3 +3,9 @@ from django.apps import AppConfig
 
 class PostsConfig(AppConfig):
     name = 'posts'
+
+    def ready(self):
+        # Проверка MEDIA_OFFLOAD регистрируется при импорте assets.
+        from yatube import assets  # noqa: F401
+
+        from . import signals  # noqa: F401
@@ -0,0 +1,322 @@
+import math
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import (DatabaseError, OperationalError, close_old_connections,
+                       connection, transaction)
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from yatube.testing import isolated_caches
+
+from . import counters, feed
+from .models import Comment, Follow, Group, Post
+
+BATCH_SIZE = 500
+
+
+def _bulk_create(model, objects):
+    return model.objects.bulk_create(objects, batch_size=BATCH_SIZE)
+
+
+@contextmanager
+def file_test_db(pragmas=None):
+    """Создает отдельную тестовую базу в файле и удаляет ее после
+
+        Потокам нужна общая файловая база: тестовая база SQLite
+        в памяти блокирует таблицы целиком. Кэши на это время тоже
+        заменяются кэшами в памяти, чтобы не трогать кэш и сессии
+        запущенного сервера.
+
+        Ключевые аргументы:
+        pragmas -- SQLITE_PRAGMAS на время создания базы
+        """
+    old_name = connection.settings_dict['NAME']
+    if pragmas is None:
+        pragmas = settings.SQLITE_PRAGMAS
+    with tempfile.TemporaryDirectory() as directory, \
+            override_settings(CACHES=isolated_caches()):
+        connection.settings_dict['TEST']['NAME'] = os.path.join(
+            directory,
+            'benchmark.sqlite3'
+        )
+        with override_settings(SQLITE_PRAGMAS=pragmas):
+            connection.close()
+            connection.creation.create_test_db(
+                verbosity=0,
+                autoclobber=True,
+            )
+        try:
+            yield
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            connection.settings_dict['TEST']['NAME'] = None
+
+
+@transaction.atomic
+def seed(users, groups, posts, comments, follows, rng):
+    """Заполняет базу тестовыми данными через bulk_create
+
+        Сигналы при bulk_create не отправляются, поэтому ленты
+        подписок и счетчики пересобираются в конце одним проходом.
+
+        Ключевые аргументы:
+        users, groups, posts, comments, follows -- сколько создать
+        rng -- экземпляр random.Random для воспроизводимости
+        """
+    User = get_user_model()
+    password = make_password('benchmark')
+    _bulk_create(User, (
+        User(username=f'bench_user_{i}', password=password)
+        for i in range(users)
+    ))
+    _bulk_create(Group, (
+        Group(title=f'Группа {i}', slug=f'bench-group-{i}', description='')
+        for i in range(groups)
+    ))
+    user_ids = list(User.objects.filter(
+        username__startswith='bench_user_'
+    ).values_list('pk', flat=True))
+    group_ids = list(Group.objects.filter(
+        slug__startswith='bench-group-'
+    ).values_list('pk', flat=True)) + [None]
+    _bulk_create(Post, (
+        Post(
+            text=f'Запись {i} ' + ' '.join(
+                rng.choice(('кот', 'пес', 'море', 'город', 'лес', 'код'))
+                for _ in range(rng.randint(5, 40))
+            ),
+            author_id=rng.choice(user_ids),
+            group_id=rng.choice(group_ids),
+        )
+        for i in range(posts)
+    ))
+    post_ids = list(Post.objects.values_list('pk', flat=True))
+    if post_ids:
+        _bulk_create(Comment, (
+            Comment(
+                text=f'Комментарий {i}',
+                post_id=rng.choice(post_ids),
+                author_id=rng.choice(user_ids),
+            )
+            for i in range(comments)
+        ))
+    pairs = set()
+    limit = min(follows, len(user_ids) * (len(user_ids) - 1))
+    while len(pairs) < limit:
+        user_id, author_id = rng.sample(user_ids, 2)
+        pairs.add((user_id, author_id))
+    _bulk_create(Follow, (
+        Follow(user_id=user_id, author_id=author_id)
+        for user_id, author_id in pairs
+    ))
+    feed.rebuild()
+    counters.rebuild()
+
+
+def percentile(values, share):
+    """Возвращает перцентиль по методу ближайшего ранга
+
+        Ключевые аргументы:
+        values -- измерения
+        share -- доля от 0 до 1, например 0.95
+        """
+    ordered = sorted(values)
+    index = max(0, math.ceil(share * len(ordered)) - 1)
+    return ordered[index]
+
+
+def measure(client, urls, repeat, clear_cache=True):
+    """Замеряет время ответа, число запросов и размер страницы
+
+        Ключевые аргументы:
+        client -- тестовый клиент Django
+        urls -- функция, возвращающая очередной адрес страницы
+        repeat -- сколько запросов сделать
+        clear_cache -- очищать ли кэш перед каждым запросом
+        """
+    latencies, queries, sizes = [], [], []
+    for _ in range(repeat):
+        url = urls()
+        if clear_cache:
+            cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = client.get(url)
+            latencies.append((time.perf_counter() - started) * 1000)
+        if response.status_code != 200:
+            raise RuntimeError(f'{url} вернул {response.status_code}')
+        queries.append(len(captured.captured_queries))
+        sizes.append(len(response.content))
+    return {
+        'requests': repeat,
+        'p50_ms': round(percentile(latencies, 0.5), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'mean_ms': round(statistics.mean(latencies), 3),
+        'queries': max(queries),
+        'bytes': round(statistics.mean(sizes)),
+    }
+
+
+def _request(rng, user_ids, post_ids, write_share):
+    if rng.random() >= write_share:
+        list(Post.objects.for_feed()[:settings.PAGINATOR_PAGE])
+        return
+    user_id, author_id = rng.sample(user_ids, 2)
+    with transaction.atomic():
+        if rng.random() < 0.5:
+            Comment.objects.create(
+                text='Комментарий',
+                post_id=rng.choice(post_ids),
+                author_id=user_id,
+            )
+            return
+        follow = Follow.objects.filter(
+            user_id=user_id,
+            author_id=author_id,
+        ).first()
+        if follow is None:
+            Follow.objects.create(user_id=user_id, author_id=author_id)
+        else:
+            follow.delete()
+
+
+def stress(threads, operations, write_share, seed_value):
+    """Нагружает базу потоками, смешивая чтение ленты и запись
+
+        Каждая операция завершается как запрос Django: соединение
+        закрывается или остается открытым по CONN_MAX_AGE.
+
+        Ключевые аргументы:
+        threads -- число потоков
+        operations -- сколько операций делает каждый поток
+        write_share -- доля операций записи от 0 до 1
+        seed_value -- зерно генераторов случайных чисел потоков
+        """
+    User = get_user_model()
+    user_ids = list(User.objects.values_list('pk', flat=True))
+    post_ids = list(Post.objects.values_list('pk', flat=True))
+    connection.close()
+    latencies = []
+    counts = {'lock_errors': 0, 'errors': 0}
+    lock = threading.Lock()
+
+    def worker(number):
+        rng = random.Random(seed_value + number)
+        measured, failures = [], {'lock_errors': 0, 'errors': 0}
+        try:
+            for _ in range(operations):
+                started = time.perf_counter()
+                try:
+                    _request(rng, user_ids, post_ids, write_share)
+                except OperationalError as error:
+                    key = 'lock_errors' if 'locked' in str(error) else 'errors'
+                    failures[key] += 1
+                except DatabaseError:
+                    failures['errors'] += 1
+                measured.append((time.perf_counter() - started) * 1000)
+                close_old_connections()
+        finally:
+            connection.close()
+            with lock:
+                latencies.extend(measured)
+                for key, value in failures.items():
+                    counts[key] += value
+
+    pool = [threading.Thread(target=worker, args=(number,))
+            for number in range(threads)]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    total = threads * operations
+    return {
+        'threads': threads,
+        'operations': total,
+        'throughput_ops': round(total / elapsed, 1),
+        'lock_errors': counts['lock_errors'],
+        'lock_error_rate': round(counts['lock_errors'] / total, 4),
+        'errors': counts['errors'],
+        'p50_ms': round(percentile(latencies, 0.5), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+    }
+
+
+def sessions(engine, users, requests, threads):
+    """Замеряет ленту подписок для многих вошедших пользователей
+
+        Ключевые аргументы:
+        engine -- SESSION_ENGINE, например cached_db
+        users -- сколько пользователей входят на сайт
+        requests -- сколько запросов делает каждый пользователь
+        threads -- число потоков
+        """
+    User = get_user_model()
+    url = reverse('follow_index')
+    measured = []
+    lock = threading.Lock()
+    with override_settings(SESSION_ENGINE=engine):
+        clients = []
+        for user in User.objects.order_by('pk')[:users]:
+            client = Client()
+            client.force_login(user)
+            clients.append(client)
+        connection.close()
+
+        def worker(number):
+            results = []
+            try:
+                for client in clients[number::threads]:
+                    for _ in range(requests):
+                        with CaptureQueriesContext(connection) as captured:
+                            started = time.perf_counter()
+                            client.get(url)
+                            elapsed = time.perf_counter() - started
+                        queries = captured.captured_queries
+                        results.append((
+                            elapsed * 1000,
+                            len(queries),
+                            sum('django_session' in query['sql']
+                                for query in queries),
+                        ))
+                    close_old_connections()
+            finally:
+                connection.close()
+                with lock:
+                    measured.extend(results)
+
+        pool = [threading.Thread(target=worker, args=(number,))
+                for number in range(threads)]
+        started = time.perf_counter()
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        for client in clients:
+            client.logout()
+    latencies = [row[0] for row in measured]
+    return {
+        'requests': len(measured),
+        'throughput_rps': round(len(measured) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.5), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'queries_per_request': round(
+            statistics.mean(row[1] for row in measured), 2
+        ),
+        'session_queries_per_request': round(
+            statistics.mean(row[2] for row in measured), 2
+        ),
+    }
@@ -0,0 +1,104 @@
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Follow, Post, UserStats
+
+
+def _count(queryset, field):
+    return Coalesce(Subquery(
+        queryset.filter(**{field: OuterRef('pk')}).order_by().values(
+            field
+        ).annotate(count=Count('pk')).values('count'),
+        output_field=IntegerField(),
+    ), 0)
+
+
+def with_actual_counts(users):
+    """Добавляет к пользователям счетчики, посчитанные по таблицам
+
+        Ключевые аргументы:
+        users -- queryset пользователей
+        """
+    return users.annotate(
+        actual_posts=_count(Post.objects.all(), 'author'),
+        actual_followers=_count(Follow.objects.all(), 'author'),
+        actual_following=_count(Follow.objects.all(), 'user'),
+    )
+
+
+def recount(user_id):
+    """Пересчитывает счетчики пользователя по таблицам
+
+        Ключевые аргументы:
+        user_id -- id пользователя
+        """
+    stats, _ = UserStats.objects.update_or_create(
+        user_id=user_id,
+        defaults={
+            'posts_count': Post.objects.filter(author_id=user_id).count(),
+            'followers_count': Follow.objects.filter(
+                author_id=user_id
+            ).count(),
+            'following_count': Follow.objects.filter(
+                user_id=user_id
+            ).count(),
+        },
+    )
+    return stats
+
+
+def adjust(user_id, **deltas):
+    """Меняет счетчики пользователя на заданные величины
+
+        Ключевые аргументы:
+        user_id -- id пользователя
+        deltas -- приращения, например posts_count=1
+        """
+    # Счетчик не уходит в минус: если он уже разошелся с таблицами,
+    # строка пересчитывается целиком. Отсутствующую строку здесь не
+    # создаем, ее пользователь может удаляться в этой же транзакции.
+    stats = UserStats.objects.filter(user_id=user_id)
+    updated = stats.filter(**{
+        f'{field}__gte': -delta
+        for field, delta in deltas.items() if delta < 0
+    }).update(**{
+        field: F(field) + delta for field, delta in deltas.items()
+    })
+    if not updated and stats.exists():
+        recount(user_id)
+
+
+def get_stats(user):
+    """Возвращает счетчики пользователя, при отсутствии считает их
+
+        Ключевые аргументы:
+        user -- пользователь, желательно загруженный с select_related
+        """
+    try:
+        return user.stats
+    except UserStats.DoesNotExist:
+        return recount(user.pk)
+
+
+def rebuild():
+    """Пересчитывает счетчики всех пользователей одним INSERT ... SELECT"""
+    stats_table = UserStats._meta.db_table
+    user_table = get_user_model()._meta.db_table
+    post_table = Post._meta.db_table
+    follow_table = Follow._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        UserStats.objects.all().delete()
+        cursor.execute(
+            f'INSERT INTO {stats_table} '
+            f'(user_id, posts_count, followers_count, following_count) '
+            f'SELECT u.id, '
+            f'(SELECT COUNT(*) FROM {post_table} p '
+            f'WHERE p.author_id = u.id), '
+            f'(SELECT COUNT(*) FROM {follow_table} f '
+            f'WHERE f.author_id = u.id), '
+            f'(SELECT COUNT(*) FROM {follow_table} f '
+            f'WHERE f.user_id = u.id) '
+            f'FROM {user_table} u'
+        )
@@ -0,0 +1,80 @@
+from django.db import connection, transaction
+
+from .models import FeedItem, Follow, Post
+
+BATCH_SIZE = 500
+
+
+def fan_out(post):
+    """Добавляет новый пост в ленты всех подписчиков автора
+
+        Ключевые аргументы:
+        post -- только что созданный пост
+        """
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    FeedItem.objects.bulk_create(
+        (FeedItem(user_id=user_id, post=post, pub_date=post.pub_date)
+         for user_id in followers.iterator()),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту подписчика все посты автора
+
+        Ключевые аргументы:
+        user_id -- id подписчика
+        author_id -- id автора
+        """
+    posts = Post.objects.filter(
+        author_id=author_id
+    ).values_list('pk', 'pub_date')
+    FeedItem.objects.bulk_create(
+        (FeedItem(user_id=user_id, post_id=pk, pub_date=pub_date)
+         for pk, pub_date in posts.iterator()),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def prune(user_id, author_id):
+    """Удаляет посты автора из ленты подписчика
+
+        Ключевые аргументы:
+        user_id -- id подписчика
+        author_id -- id автора
+        """
+    FeedItem.objects.filter(
+        user_id=user_id,
+        post__in=Post.objects.filter(author_id=author_id).values('pk'),
+    ).delete()
+
+
+def rebuild(user_id=None):
+    """Пересобирает ленты подписок одним INSERT ... SELECT
+
+        Ключевые аргументы:
+        user_id -- id пользователя, по умолчанию все пользователи
+        """
+    feed_table = FeedItem._meta.db_table
+    follow_table = Follow._meta.db_table
+    post_table = Post._meta.db_table
+    feed = FeedItem.objects.all()
+    where, params = '', []
+    if user_id is not None:
+        feed = feed.filter(user_id=user_id)
+        where, params = 'WHERE f.user_id = %s', [user_id]
+    with transaction.atomic(), connection.cursor() as cursor:
+        feed.delete()
+        cursor.execute(
+            f'INSERT INTO {feed_table} (user_id, post_id, pub_date) '
+            f'SELECT f.user_id, p.id, p.pub_date '
+            f'FROM {follow_table} f '
+            f'JOIN {post_table} p ON p.author_id = f.author_id '
+            f'{where}',
+            params,
+        )
+        return cursor.rowcount
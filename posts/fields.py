@@ -0,0 +1,41 @@
+from django.db import models
+
+from .images import normalize
+
+
+class NormalizedImageField(models.ImageField):
+    """Поле изображения, которое перед записью приводит файл к виду
+    из настроек POST_IMAGE_*
+
+        Новый файл обрабатывается normalize при любом сохранении
+        модели: из формы, админки, команды или кода. Уже записанный
+        файл не трогается, поэтому повторное сохранение его
+        не пережимает.
+
+        Ключевые аргументы:
+        size_fields -- поля модели для ширины и высоты изображения,
+        они должны идти в модели после этого поля
+        """
+
+    def __init__(self, *args, size_fields=None, **kwargs):
+        self.size_fields = size_fields
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.size_fields is not None:
+            kwargs['size_fields'] = self.size_fields
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        file = getattr(model_instance, self.attname)
+        size = None
+        if file and not file._committed:
+            normalized, size = normalize(file.file)
+            setattr(model_instance, self.attname, normalized)
+        if self.size_fields is not None and (size or not file):
+            width_field, height_field = self.size_fields
+            width, height = size or (None, None)
+            setattr(model_instance, width_field, width)
+            setattr(model_instance, height_field, height)
+        return super().pre_save(model_instance, add)
@@ -0,0 +1,81 @@
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files.uploadedfile import InMemoryUploadedFile
+from PIL import Image, ImageOps
+
+ORIENTATION = 0x0112
+# Файлы больше этого размера сбрасываются из памяти во временный файл
+SPOOL_SIZE = 2 * 1024 * 1024
+
+FORMATS = {
+    'JPEG': ('jpg', 'image/jpeg', {'optimize': True, 'progressive': True}),
+    'WEBP': ('webp', 'image/webp', {'method': 4}),
+    'PNG': ('png', 'image/png', {'optimize': True}),
+}
+
+
+def _prepare_mode(image, image_format):
+    has_alpha = (image.mode in ('RGBA', 'LA', 'PA')
+                 or 'transparency' in image.info)
+    if not has_alpha:
+        return image if image.mode == 'RGB' else image.convert('RGB')
+    image = image.convert('RGBA')
+    if image_format != 'JPEG':
+        return image
+    # JPEG не хранит прозрачность, подкладываем белый фон.
+    background = Image.new('RGB', image.size, (255, 255, 255))
+    background.paste(image, mask=image.getchannel('A'))
+    return background
+
+
+def normalize(upload):
+    """Уменьшает изображение, поворачивает по EXIF и пересохраняет
+    без метаданных
+
+        JPEG декодируется сразу в уменьшенном масштабе через draft,
+        поэтому полноразмерная копия в памяти не создается.
+
+        Ключевые аргументы:
+        upload -- новый файл изображения, например из формы
+        """
+    image_format = settings.POST_IMAGE_FORMAT
+    extension, content_type, options = FORMATS[image_format]
+    limit = settings.POST_IMAGE_MAX_SIZE
+    upload.seek(0)
+    image = Image.open(upload)
+    orientation = image.getexif().get(ORIENTATION, 1)
+    # Для JPEG draft выбирает масштаб декодирования не меньше limit.
+    image.draft('RGB', (limit, limit))
+    # Границы квадратные, поэтому поворот после уменьшения
+    # дает тот же размер, но обходится дешевле.
+    image.thumbnail((limit, limit), Image.LANCZOS)
+    if orientation != 1:
+        image = ImageOps.exif_transpose(image)
+    icc_profile = image.info.get('icc_profile')
+    image = _prepare_mode(image, image_format)
+    # EXIF, комментарии и прочие метаданные не переносятся, цветовой
+    # профиль оставляем, иначе цвета фотографий исказятся.
+    image.info.clear()
+    if icc_profile:
+        options = {**options, 'icc_profile': icc_profile}
+    output = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+    image.save(
+        output,
+        image_format,
+        quality=settings.POST_IMAGE_QUALITY,
+        **options,
+    )
+    size = output.tell()
+    output.seek(0)
+    stem = os.path.splitext(os.path.basename(upload.name))[0]
+    normalized = InMemoryUploadedFile(
+        output,
+        'image',
+        f'{stem}.{extension}',
+        content_type,
+        size,
+        None,
+    )
+    return normalized, image.size
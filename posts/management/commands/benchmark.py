@@ -0,0 +1,130 @@
+import json
+import random
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import (setup_test_environment,
+                               teardown_test_environment)
+from django.urls import reverse
+
+from posts.benchmark import measure, seed
+from posts.models import Follow, Group, Post
+from yatube.testing import isolated_caches
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет отдельную тестовую базу и замеряет время ответа, '
+        'число запросов и размер страниц лент'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=5000)
+        parser.add_argument('--comments', type=int, default=10000)
+        parser.add_argument('--follows', type=int, default=2000)
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=50,
+            help='Сколько запросов делать к каждой странице',
+        )
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--warm-cache',
+            action='store_true',
+            help='Не очищать кэш перед запросами',
+        )
+        parser.add_argument(
+            '--keepdb',
+            action='store_true',
+            help='Не удалять тестовую базу, использовать уже заполненную',
+        )
+        parser.add_argument(
+            '--output',
+            help='Файл для JSON-отчета, по умолчанию stdout',
+        )
+
+    def handle(self, *args, **options):
+        # measure очищает кэш перед запросами, поэтому кэши подменяются
+        # кэшами в памяти: кэш и сессии запущенного сервера не трогаются.
+        with override_settings(CACHES=isolated_caches()):
+            report = self.run_benchmark(options)
+        report = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(report)
+        else:
+            self.stdout.write(report)
+
+    def run_benchmark(self, options):
+        rng = random.Random(options['seed'])
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(
+            verbosity=0,
+            autoclobber=True,
+            keepdb=options['keepdb'],
+        )
+        try:
+            if not Post.objects.exists():
+                seed(
+                    options['users'],
+                    options['groups'],
+                    options['posts'],
+                    options['comments'],
+                    options['follows'],
+                    rng,
+                )
+            report = self.run_views(rng, options)
+        finally:
+            connection.creation.destroy_test_db(
+                old_name,
+                verbosity=0,
+                keepdb=options['keepdb'],
+            )
+            teardown_test_environment()
+        return report
+
+    def run_views(self, rng, options):
+        User = get_user_model()
+        usernames = list(User.objects.values_list('username', flat=True))
+        slugs = list(Group.objects.values_list('slug', flat=True))
+        posts = list(Post.objects.values_list('author__username', 'pk'))
+        follower = Follow.objects.values_list(
+            'user__username',
+            flat=True
+        ).first() or usernames[0]
+        client = Client()
+        client.force_login(User.objects.get(username=follower))
+        views = {
+            'index': lambda: reverse('index'),
+            'group_posts': lambda: reverse(
+                'group',
+                args=(rng.choice(slugs),)
+            ),
+            'profile': lambda: reverse(
+                'profile',
+                args=(rng.choice(usernames),)
+            ),
+            'post_view': lambda: reverse('post', args=rng.choice(posts)),
+            'follow_index': lambda: reverse('follow_index'),
+        }
+        return {
+            'volumes': {
+                key: options[key]
+                for key in ('users', 'groups', 'posts', 'comments', 'follows')
+            },
+            'views': {
+                name: measure(
+                    client,
+                    url,
+                    options['repeat'],
+                    clear_cache=not options['warm_cache'],
+                )
+                for name, url in views.items()
+            },
+        }
@@ -0,0 +1,61 @@
+import json
+import random
+
+from django.core.management.base import BaseCommand
+
+from posts.benchmark import file_test_db, seed, sessions
+
+ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает сессии в базе и в кэше с записью в базу: время '
+        'ответа ленты подписок и число запросов к django_session '
+        'для многих пользователей одновременно'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=20,
+            help='Сколько запросов делает каждый пользователь',
+        )
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--output',
+            help='Файл для JSON-отчета, по умолчанию stdout',
+        )
+
+    def handle(self, *args, **options):
+        report = {
+            key: options[key] for key in ('users', 'requests', 'threads')
+        }
+        with file_test_db():
+            seed(
+                options['users'],
+                5,
+                options['users'] * 10,
+                options['users'] * 10,
+                options['users'] * 5,
+                random.Random(options['seed']),
+            )
+            for name, engine in ENGINES.items():
+                report[name] = sessions(
+                    engine,
+                    options['users'],
+                    options['requests'],
+                    options['threads'],
+                )
+        report = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(report)
+        else:
+            self.stdout.write(report)
@@ -0,0 +1,91 @@
+import json
+import random
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+
+from posts.benchmark import file_test_db, seed, stress
+
+# Настройки Django по умолчанию: журнал DELETE, новое соединение
+# на каждый запрос и отложенный BEGIN.
+DEFAULT_PROFILE = ({'journal_mode': 'DELETE'}, 0, {})
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность и долю ошибок database is '
+        'locked для настроек SQLite по умолчанию и SQLITE_PRAGMAS '
+        'на отдельной файловой базе'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument(
+            '--operations',
+            type=int,
+            default=200,
+            help='Сколько операций делает каждый поток',
+        )
+        parser.add_argument(
+            '--write-share',
+            type=float,
+            default=0.3,
+            help='Доля записей: комментарии и подписки',
+        )
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--posts', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--output',
+            help='Файл для JSON-отчета, по умолчанию stdout',
+        )
+
+    def handle(self, *args, **options):
+        profiles = {
+            'default': DEFAULT_PROFILE,
+            'tuned': (
+                settings.SQLITE_PRAGMAS,
+                connection.settings_dict['CONN_MAX_AGE'] or 60,
+                connection.settings_dict['OPTIONS'],
+            ),
+        }
+        old_max_age = connection.settings_dict['CONN_MAX_AGE']
+        old_options = connection.settings_dict['OPTIONS']
+        report = {
+            key: options[key]
+            for key in ('threads', 'operations', 'write_share')
+        }
+        with file_test_db(DEFAULT_PROFILE[0]):
+            seed(
+                options['users'],
+                5,
+                options['posts'],
+                options['posts'],
+                options['users'],
+                random.Random(options['seed']),
+            )
+            # Профиль по умолчанию первым: режим WAL сохраняется в файле
+            # базы.
+            try:
+                for name, (pragmas, max_age, params) in profiles.items():
+                    connection.close()
+                    connection.settings_dict['CONN_MAX_AGE'] = max_age
+                    connection.settings_dict['OPTIONS'] = params
+                    with override_settings(SQLITE_PRAGMAS=pragmas):
+                        report[name] = stress(
+                            options['threads'],
+                            options['operations'],
+                            options['write_share'],
+                            options['seed'],
+                        )
+            finally:
+                connection.settings_dict['CONN_MAX_AGE'] = old_max_age
+                connection.settings_dict['OPTIONS'] = old_options
+        report = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(report)
+        else:
+            self.stdout.write(report)
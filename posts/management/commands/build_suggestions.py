@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import suggestions
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рекомендации подписок по графу подписок: друзья '
+        'друзей и пользователи с похожими подписками'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=settings.SUGGESTIONS_STORED,
+            help='Сколько рекомендаций хранить на пользователя',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Сколько пользователей записывать за одну транзакцию',
+        )
+
+    def handle(self, *args, **options):
+        users = suggestions.build(options['top'], options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Рекомендации пересчитаны для пользователей: {users}'
+        ))
@@ -0,0 +1,233 @@
+import json
+import sys
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts import counters, feed, trending
+from posts.models import Comment, Follow, Group, Post
+
+
+@contextmanager
+def keep_dates(*fields):
+    """Отключает auto_now_add, чтобы сохранить даты из файла
+
+        Ключевые аргументы:
+        fields -- поля DateTimeField с auto_now_add
+        """
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def parse_date(value):
+    date = parse_datetime(value) if value else None
+    if date is None:
+        return timezone.now()
+    if timezone.is_naive(date):
+        return timezone.make_aware(date)
+    return date
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует посты, комментарии и подписки из NDJSON. '
+        'Каждая строка — объект с полем type: post, comment или '
+        'follow (по умолчанию post). Комментарии ссылаются на id '
+        'поста из того же файла, посты должны идти раньше.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Файл NDJSON или - для чтения из stdin',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5000,
+            help='Сколько строк записывать в одной транзакции',
+        )
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        self.users = dict(User.objects.values_list('username', 'pk'))
+        self.groups = dict(Group.objects.values_list('slug', 'pk'))
+        self.posts = {}
+        self.imported = {'post': 0, 'comment': 0, 'follow': 0}
+        self.skipped = 0
+        self.started = time.monotonic()
+        chunk_size = options['chunk_size']
+        source = (sys.stdin if options['path'] == '-'
+                  else open(options['path'], encoding='utf-8'))
+        chunk = []
+        flushed = False
+        try:
+            with source, keep_dates(
+                Post._meta.get_field('pub_date'),
+                Comment._meta.get_field('created'),
+            ):
+                for number, line in enumerate(source, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        chunk.append(json.loads(line))
+                    except ValueError as error:
+                        raise CommandError(f'Строка {number}: {error}')
+                    if len(chunk) >= chunk_size:
+                        self.flush(chunk)
+                        flushed = True
+                        chunk = []
+                if chunk:
+                    self.flush(chunk)
+                    flushed = True
+        finally:
+            # bulk_create не отправляет сигналы, поэтому ленты, счетчики
+            # и кэш страниц обновляются один раз в конце, в том числе
+            # когда ошибка прервала импорт после записанных пачек.
+            if flushed:
+                feed.rebuild()
+                counters.rebuild()
+                cache.clear()
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово. {self.progress()}'
+        ))
+
+    def progress(self):
+        total = sum(self.imported.values())
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return (
+            f'Постов: {self.imported["post"]}, '
+            f'комментариев: {self.imported["comment"]}, '
+            f'подписок: {self.imported["follow"]}, '
+            f'пропущено: {self.skipped}, '
+            f'{total / elapsed:.0f} строк/с'
+        )
+
+    @transaction.atomic
+    def flush(self, chunk):
+        self.events = []
+        rows = {'post': [], 'comment': [], 'follow': []}
+        for row in chunk:
+            kind = row.get('type', 'post')
+            if kind not in rows:
+                self.skipped += 1
+                continue
+            rows[kind].append(row)
+        self.resolve_users(
+            [row.get('author') for row in chunk]
+            + [row.get('user') for row in rows['follow']]
+        )
+        self.resolve_groups([row.get('group') for row in rows['post']])
+        self.import_posts(rows['post'])
+        self.import_comments(rows['comment'])
+        self.import_follows(rows['follow'])
+        # Оценки популярности дополняются в той же транзакции, что
+        # и пачка: остальные оценки, в том числе от подписок, остаются.
+        trending.add_events(self.events)
+        self.stdout.write(self.progress())
+
+    def resolve_users(self, usernames):
+        User = get_user_model()
+        missing = {name for name in usernames
+                   if name and name not in self.users}
+        if not missing:
+            return
+        User.objects.bulk_create(
+            [User(username=name, password='!') for name in missing],
+            ignore_conflicts=True,
+        )
+        self.users.update(User.objects.filter(
+            username__in=missing
+        ).values_list('username', 'pk'))
+
+    def resolve_groups(self, slugs):
+        missing = {slug for slug in slugs
+                   if slug and slug not in self.groups}
+        if not missing:
+            return
+        Group.objects.bulk_create(
+            [Group(title=slug, slug=slug, description='')
+             for slug in missing],
+            ignore_conflicts=True,
+        )
+        self.groups.update(Group.objects.filter(
+            slug__in=missing
+        ).values_list('slug', 'pk'))
+
+    def import_posts(self, rows):
+        # SQLite не возвращает id из bulk_create, поэтому id
+        # назначаются заранее и запоминаются для комментариев.
+        next_id = (Post.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+        posts = []
+        for row in rows:
+            author_id = self.users.get(row.get('author'))
+            if author_id is None or not row.get('text'):
+                self.skipped += 1
+                continue
+            post = Post(
+                pk=next_id,
+                text=row['text'],
+                pub_date=parse_date(row.get('pub_date')),
+                author_id=author_id,
+                group_id=self.groups.get(row.get('group')),
+                image=self.image_name(row.get('image')),
+            )
+            if row.get('id') is not None:
+                self.posts[row['id']] = (next_id, post.group_id)
+            self.events.append(('post', next_id, post.group_id,
+                                post.pub_date))
+            posts.append(post)
+            next_id += 1
+        Post.objects.bulk_create(posts)
+        self.imported['post'] += len(posts)
+
+    def image_name(self, image):
+        # Экспорт отдает адрес файла, в модели хранится путь в MEDIA_ROOT.
+        if image and image.startswith(settings.MEDIA_URL):
+            return image[len(settings.MEDIA_URL):]
+        return image or None
+
+    def import_comments(self, rows):
+        comments = []
+        for row in rows:
+            post_id, group_id = self.posts.get(row.get('post'), (None, None))
+            author_id = self.users.get(row.get('author'))
+            if post_id is None or author_id is None or not row.get('text'):
+                self.skipped += 1
+                continue
+            comment = Comment(
+                post_id=post_id,
+                author_id=author_id,
+                text=row['text'],
+                created=parse_date(row.get('created')),
+            )
+            self.events.append(('comment', post_id, group_id,
+                                comment.created))
+            comments.append(comment)
+        Comment.objects.bulk_create(comments)
+        self.imported['comment'] += len(comments)
+
+    def import_follows(self, rows):
+        follows = []
+        for row in rows:
+            user_id = self.users.get(row.get('user'))
+            author_id = self.users.get(row.get('author'))
+            if user_id is None or author_id is None or user_id == author_id:
+                self.skipped += 1
+                continue
+            follows.append(Follow(user_id=user_id, author_id=author_id))
+        Follow.objects.bulk_create(follows, ignore_conflicts=True)
+        self.imported['follow'] += len(follows)
@@ -0,0 +1,46 @@
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет истекшие сессии из базы порциями, не блокируя '
+        'запись надолго, в отличие от clearsessions'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Сколько сессий удалять одним запросом',
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0,
+            help='Пауза между порциями в секундах',
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        expired = Session.objects.filter(expire_date__lt=now)
+        deleted = 0
+        while True:
+            keys = list(expired.values_list(
+                'session_key',
+                flat=True
+            )[:options['batch_size']])
+            if not keys:
+                break
+            # Записи в кэше истекают сами: их срок совпадает с expire_date.
+            deleted += Session.objects.filter(session_key__in=keys).delete()[0]
+            self.stdout.write(f'Удалено: {deleted}')
+            if options['pause']:
+                time.sleep(options['pause'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово. Удалено истекших сессий: {deleted}'
+        ))
@@ -0,0 +1,29 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import feed
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает материализованные ленты подписок'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            help='Имя пользователя, чью ленту нужно пересобрать',
+        )
+
+    def handle(self, *args, **options):
+        user_id = None
+        if options['user']:
+            User = get_user_model()
+            try:
+                user_id = User.objects.get(username=options['user']).pk
+            except User.DoesNotExist:
+                raise CommandError(
+                    f'Пользователь {options["user"]} не найден'
+                )
+        rows = feed.rebuild(user_id)
+        self.stdout.write(self.style.SUCCESS(
+            f'Записей в лентах: {rows}'
+        ))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = (
+        'Заново считает популярность постов и сообществ по постам '
+        'и комментариям. В обычной работе оценки обновляются по событиям'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--half-lives',
+            type=int,
+            default=10,
+            help='За сколько периодов полураспада учитывать события',
+        )
+
+    def handle(self, *args, **options):
+        posts, groups = trending.rebuild(options['half_lives'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Постов: {posts}. Сообществ: {groups}'
+        ))
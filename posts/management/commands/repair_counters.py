@@ -0,0 +1,63 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.counters import recount, with_actual_counts
+
+FIELDS = (
+    ('posts_count', 'actual_posts'),
+    ('followers_count', 'actual_followers'),
+    ('following_count', 'actual_following'),
+)
+
+
+class Command(BaseCommand):
+    help = 'Проверяет и исправляет счетчики пользователей порциями'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Сколько пользователей проверять за одну транзакцию',
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только сообщить о расхождениях, ничего не меняя',
+        )
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        chunk_size = options['chunk_size']
+        last_pk, checked, fixed = 0, 0, 0
+        while True:
+            rows = list(with_actual_counts(
+                User.objects.filter(pk__gt=last_pk).order_by('pk')
+            ).values(
+                'pk',
+                'stats__posts_count',
+                'stats__followers_count',
+                'stats__following_count',
+                *(actual for _, actual in FIELDS),
+            )[:chunk_size])
+            if not rows:
+                break
+            last_pk = rows[-1]['pk']
+            checked += len(rows)
+            broken = [row for row in rows if any(
+                row[f'stats__{field}'] != row[actual]
+                for field, actual in FIELDS
+            )]
+            fixed += len(broken)
+            if options['check'] or not broken:
+                continue
+            # Пересчет внутри транзакции, чтобы не затереть изменения,
+            # сделанные после чтения порции.
+            with transaction.atomic():
+                for row in broken:
+                    recount(row['pk'])
+        verb = 'Расхождений' if options['check'] else 'Исправлено'
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено пользователей: {checked}. {verb}: {fixed}'
+        ))
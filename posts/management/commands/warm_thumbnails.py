@@ -0,0 +1,53 @@
+import os
+import time
+from multiprocessing import Pool
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts.models import Post
+from posts.thumbnails import warm
+
+
+def _warm_one(name):
+    try:
+        warm(name)
+    except Exception as error:
+        return name, str(error)
+    return name, None
+
+
+class Command(BaseCommand):
+    help = 'Заранее создает миниатюры всех изображений постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Число процессов, по умолчанию по числу ядер',
+        )
+
+    def handle(self, *args, **options):
+        names = Post.objects.exclude(image='').exclude(
+            image__isnull=True
+        ).values_list('image', flat=True).distinct()
+        started = time.monotonic()
+        workers = options['workers']
+        if workers > 1:
+            names = list(names)
+            # Дочерние процессы не должны делить соединение с родителем.
+            connections.close_all()
+            with Pool(workers) as pool:
+                results = list(pool.imap_unordered(
+                    _warm_one, names, chunksize=8
+                ))
+        else:
+            results = [_warm_one(name) for name in names.iterator()]
+        failed = [(name, error) for name, error in results if error]
+        for name, error in failed:
+            self.stderr.write(f'{name}: {error}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Изображений: {len(results)}, ошибок: {len(failed)}, '
+            f'за {time.monotonic() - started:.1f} с'
+        ))
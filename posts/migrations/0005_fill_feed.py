@@ -0,0 +1,22 @@
+# Generated by Django 2.2.6 on 2026-10-18 16:47
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0004_feeditem'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            # Дубли подписок удаляются только в 0006, а старые базы
+            # их допускали.
+            'INSERT INTO posts_feeditem (user_id, post_id, pub_date) '
+            'SELECT DISTINCT f.user_id, p.id, p.pub_date '
+            'FROM posts_follow f '
+            'JOIN posts_post p ON p.author_id = f.author_id',
+            'DELETE FROM posts_feeditem',
+        ),
+    ]
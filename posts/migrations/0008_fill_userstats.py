@@ -0,0 +1,23 @@
+# Generated by Django 2.2.6 on 2026-10-18 17:02
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_userstats'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'INSERT INTO posts_userstats '
+            '(user_id, posts_count, followers_count, following_count) '
+            'SELECT u.id, '
+            '(SELECT COUNT(*) FROM posts_post p WHERE p.author_id = u.id), '
+            '(SELECT COUNT(*) FROM posts_follow f WHERE f.author_id = u.id), '
+            '(SELECT COUNT(*) FROM posts_follow f WHERE f.user_id = u.id) '
+            'FROM auth_user u',
+            'DELETE FROM posts_userstats',
+        ),
+    ]
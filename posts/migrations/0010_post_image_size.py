@@ -0,0 +1,51 @@
+# Generated by Django 2.2.6 on 2026-10-18 17:06
+
+from importlib import import_module
+
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+from PIL import Image
+
+fts = import_module('posts.migrations.0009_post_fts')
+
+# SQLite добавляет столбцы, пересоздавая posts_post, и вместе со старой
+# таблицей удаляет триггеры полнотекстового индекса.
+restore_fts = fts.run(fts.CREATE[1:])
+
+
+def fill_image_size(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    posts = Post.objects.exclude(image='').exclude(image__isnull=True)
+    for post in posts.only('pk', 'image').iterator():
+        try:
+            with default_storage.open(post.image.name) as source:
+                width, height = Image.open(source).size
+        except (OSError, ValueError):
+            continue
+        Post.objects.filter(pk=post.pk).update(
+            image_width=width,
+            image_height=height,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_post_fts'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_fts),
+        migrations.AddField(
+            model_name='post',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Высота изображения'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Ширина изображения'),
+        ),
+        migrations.RunPython(restore_fts, migrations.RunPython.noop),
+        migrations.RunPython(fill_image_size, migrations.RunPython.noop),
+    ]
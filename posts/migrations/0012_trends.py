@@ -0,0 +1,49 @@
+# Generated by Django 2.2.6 on 2026-10-18 17:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_suggestion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupTrend',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trend', serialize=False, to='posts.Group', verbose_name='Сообщество')),
+                ('score', models.FloatField(verbose_name='Логарифм оценки')),
+            ],
+            options={
+                'verbose_name': 'Популярность сообщества',
+                'verbose_name_plural': 'Популярность сообществ',
+            },
+        ),
+        migrations.CreateModel(
+            name='PostTrend',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trend', serialize=False, to='posts.Post', verbose_name='Пост')),
+                ('score', models.FloatField(verbose_name='Логарифм оценки')),
+                ('group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='post_trends', to='posts.Group', verbose_name='Сообщество')),
+            ],
+            options={
+                'verbose_name': 'Популярность поста',
+                'verbose_name_plural': 'Популярность постов',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='grouptrend',
+            index=models.Index(fields=['-score'], name='group_trend_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='posttrend',
+            index=models.Index(fields=['-score'], name='post_trend_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='posttrend',
+            index=models.Index(fields=['group', '-score'], name='post_trend_group_score_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 2.2.6 on 2026-10-18 17:50
+
+from django.db import migrations
+import posts.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_trends'),
+    ]
+
+    # Столбец не меняется. AlterField в SQLite пересоздал бы posts_post
+    # и удалил триггеры полнотекстового индекса, поэтому меняется
+    # только состояние.
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='post',
+                    name='image',
+                    field=posts.fields.NormalizedImageField(blank=True, help_text='Загрузите изображение', null=True, size_fields=('image_width', 'image_height'), upload_to='posts/', verbose_name='Изображение'),
+                ),
+            ],
+        ),
+    ]
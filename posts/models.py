@@ -1,9 +1,33 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .fields import NormalizedImageField
 
 User = get_user_model()
 
 
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Возвращает посты вместе с автором, группой и числом комментариев
+
+        Ключевые аргументы:
+        comment_count -- число комментариев, считается подзапросом
+        только для постов выбранной страницы
+        """
+        comments = Comment.objects.filter(
+            post=OuterRef('pk')
+        ).order_by().values('post').annotate(
+            count=Count('pk')
+        ).values('count')
+        return self.select_related('author', 'group').annotate(
+            comment_count=Coalesce(
+                Subquery(comments, output_field=IntegerField()), 0
+            )
+        )
+
+
 class Post(models.Model):
     text = models.TextField(
         'Содержание поста',
@@ -23,14 +47,29 @@ class Post(models.Model):
         verbose_name='Группа',
         help_text='Выберите группу'
     )
-    image = models.ImageField(
+    image = NormalizedImageField(
         upload_to='posts/',
         blank=True,
         null=True,
         verbose_name='Изображение',
-        help_text='Загрузите изображение'
+        help_text='Загрузите изображение',
+        size_fields=('image_width', 'image_height'),
+    )
+    image_width = models.PositiveIntegerField(
+        'Ширина изображения',
+        blank=True,
+        null=True,
+        editable=False,
+    )
+    image_height = models.PositiveIntegerField(
+        'Высота изображения',
+        blank=True,
+        null=True,
+        editable=False,
     )
 
+    objects = PostQuerySet.as_manager()
+
     def __str__(self) -> str:
         """Возвращает пост в удобоваримом виде
 
@@ -43,6 +82,20 @@ class Post(models.Model):
         ordering = ('-pub_date',)
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        indexes = (
+            models.Index(
+                fields=('pub_date',),
+                name='post_pub_date_idx',
+            ),
+            models.Index(
+                fields=('author', 'pub_date'),
+                name='post_author_pub_date_idx',
+            ),
+            models.Index(
+                fields=('group', 'pub_date'),
+                name='post_group_pub_date_idx',
+            ),
+        )
 
 
 class Group(models.Model):
@@ -100,6 +153,12 @@ class Comment(models.Model):
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = (
+            models.Index(
+                fields=('post', 'created'),
+                name='comment_post_created_idx',
+            ),
+        )
 
 
 class Follow(models.Model):
@@ -119,3 +178,146 @@ class Follow(models.Model):
     class Meta:
         verbose_name = 'Подписчик'
         verbose_name_plural = 'Подписчики'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'author'),
+                name='unique_follow',
+            ),
+        )
+
+
+class FeedItem(models.Model):
+    user = models.ForeignKey(
+        User,
+        related_name='feed_items',
+        on_delete=models.CASCADE,
+        verbose_name='Подписчик'
+    )
+    post = models.ForeignKey(
+        'Post',
+        related_name='feed_items',
+        on_delete=models.CASCADE,
+        verbose_name='Пост'
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Лента подписок'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'post'),
+                name='unique_feed_item',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-pub_date', '-post'),
+                name='feed_user_pub_date_idx',
+            ),
+        )
+
+
+class UserStats(models.Model):
+    user = models.OneToOneField(
+        User,
+        primary_key=True,
+        related_name='stats',
+        on_delete=models.CASCADE,
+        verbose_name='Пользователь'
+    )
+    posts_count = models.PositiveIntegerField('Записей', default=0)
+    followers_count = models.PositiveIntegerField('Подписчиков', default=0)
+    following_count = models.PositiveIntegerField('Подписан', default=0)
+
+    class Meta:
+        verbose_name = 'Счетчики пользователя'
+        verbose_name_plural = 'Счетчики пользователей'
+
+
+class Suggestion(models.Model):
+    user = models.ForeignKey(
+        User,
+        related_name='suggestions',
+        on_delete=models.CASCADE,
+        verbose_name='Пользователь'
+    )
+    candidate = models.ForeignKey(
+        User,
+        related_name='suggested_to',
+        on_delete=models.CASCADE,
+        verbose_name='На кого подписаться'
+    )
+    rank = models.PositiveSmallIntegerField('Место')
+    score = models.FloatField('Оценка')
+    mutual = models.PositiveIntegerField('Общих подписок', default=0)
+
+    class Meta:
+        verbose_name = 'Рекомендация'
+        verbose_name_plural = 'Рекомендации подписок'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'candidate'),
+                name='unique_suggestion',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', 'rank'),
+                name='suggestion_user_rank_idx',
+            ),
+        )
+
+
+class PostTrend(models.Model):
+    post = models.OneToOneField(
+        'Post',
+        primary_key=True,
+        related_name='trend',
+        on_delete=models.CASCADE,
+        verbose_name='Пост'
+    )
+    group = models.ForeignKey(
+        'Group',
+        blank=True,
+        null=True,
+        related_name='post_trends',
+        on_delete=models.CASCADE,
+        verbose_name='Сообщество'
+    )
+    score = models.FloatField('Логарифм оценки')
+
+    class Meta:
+        verbose_name = 'Популярность поста'
+        verbose_name_plural = 'Популярность постов'
+        indexes = (
+            models.Index(
+                fields=('-score',),
+                name='post_trend_score_idx',
+            ),
+            models.Index(
+                fields=('group', '-score'),
+                name='post_trend_group_score_idx',
+            ),
+        )
+
+
+class GroupTrend(models.Model):
+    group = models.OneToOneField(
+        'Group',
+        primary_key=True,
+        related_name='trend',
+        on_delete=models.CASCADE,
+        verbose_name='Сообщество'
+    )
+    score = models.FloatField('Логарифм оценки')
+
+    class Meta:
+        verbose_name = 'Популярность сообщества'
+        verbose_name_plural = 'Популярность сообществ'
+        indexes = (
+            models.Index(
+                fields=('-score',),
+                name='group_trend_score_idx',
+            ),
+        )
@@ -0,0 +1,160 @@
+import hashlib
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404, HttpResponse
+from django.views.decorators.http import condition
+
+from .models import Post
+
+VERSION_KEY = 'page_version:{}'
+POST_KEY = 'post_detail:{}:{}'
+PAGE_KEY = 'page:{}'
+GLOBAL_SCOPE = 'global'
+
+
+def group_scope(slug):
+    return f'group:{slug}'
+
+
+def author_scope(username):
+    return f'author:{username.lower()}'
+
+
+def viewer_scope(user_id):
+    return f'viewer:{user_id}'
+
+
+def _new_version():
+    # Версия не должна совпасть ни с одной из прежних, в том числе
+    # после вытеснения из кэша. Новое значение записывается целиком,
+    # а не через incr: в общем кэше incr не атомарен и два процесса
+    # могли бы получить одну и ту же версию.
+    return uuid.uuid4().hex
+
+
+def get_version(scope):
+    """Возвращает текущую версию области кэша
+
+        Ключевые аргументы:
+        scope -- область: global, group:<slug> или author:<username>
+        """
+    key = VERSION_KEY.format(scope)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump(*scopes):
+    """Меняет версии областей, старые страницы больше не читаются
+
+        Ключевые аргументы:
+        scopes -- области, содержимое которых изменилось
+        """
+    cache.set_many({
+        VERSION_KEY.format(scope): _new_version() for scope in set(scopes)
+    }, None)
+
+
+def _scope_maker(scope):
+    return {
+        'global': lambda value: GLOBAL_SCOPE,
+        'group': group_scope,
+        'author': author_scope,
+    }[scope]
+
+
+def get_post(username, post_id):
+    """Возвращает пост с автором, группой и счетчиками из кэша или
+    одним запросом
+
+        Ключ включает версию области автора, поэтому запись устаревает
+        при правке поста, новом комментарии и подписке на автора.
+
+        Ключевые аргументы:
+        username -- автор из адреса, пост другого автора дает 404
+        post_id -- id поста
+        """
+    def load():
+        try:
+            return Post.objects.for_feed().select_related(
+                'author__stats'
+            ).get(pk=post_id, author__username__iexact=username)
+        except Post.DoesNotExist:
+            raise Http404
+
+    return cache.get_or_set(
+        POST_KEY.format(post_id, get_version(author_scope(username))),
+        load,
+        settings.POST_CACHE_TIMEOUT,
+    )
+
+
+def cache_anonymous_page(scope, kwarg=None):
+    """Кэширует страницу для анонимных пользователей по версии области
+
+        Ключевые аргументы:
+        scope -- имя области: global, group или author
+        kwarg -- аргумент view, из которого берется slug или username
+        """
+    make_scope = _scope_maker(scope)
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET' or request.user.is_authenticated:
+                return view(request, *args, **kwargs)
+            version = get_version(make_scope(kwargs.get(kwarg)))
+            digest = hashlib.md5(
+                f'{request.get_full_path()}|{version}'.encode()
+            ).hexdigest()
+            key = PAGE_KEY.format(digest)
+            cached = cache.get(key)
+            if cached is not None:
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type)
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200 and not response.cookies:
+                cache.set(
+                    key,
+                    (response.content, response['Content-Type']),
+                    settings.PAGE_CACHE_TIMEOUT,
+                )
+            return response
+        return wrapper
+    return decorator
+
+
+def conditional_page(scope, kwarg=None, per_viewer=False):
+    """Отвечает 304, если область не менялась с прошлого запроса клиента
+
+        ETag строится из адреса страницы с курсором, версии области
+        и id пользователя. Шаблоны при совпадении не отрисовываются.
+        Last-Modified не отдается: время сброса области не зависит
+        от пользователя и хранится с точностью до секунды.
+
+        Ключевые аргументы:
+        scope -- имя области: global, group или author
+        kwarg -- аргумент view, из которого берется slug или username
+        per_viewer -- учитывать ли версию области viewer:<id>, если
+        страница показывает данные самого пользователя, например
+        рекомендации
+        """
+    make_scope = _scope_maker(scope)
+
+    def etag(request, *args, **kwargs):
+        version = get_version(make_scope(kwargs.get(kwarg)))
+        viewer = ''
+        if request.user.is_authenticated:
+            viewer = request.user.pk
+            if per_viewer:
+                viewer = f'{viewer}|{get_version(viewer_scope(viewer))}'
+        return hashlib.md5(
+            f'{request.get_full_path()}|{version}|{viewer}'.encode()
+        ).hexdigest()
+
+    return condition(etag_func=etag)
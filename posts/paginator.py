@@ -0,0 +1,134 @@
+import base64
+import binascii
+
+from django.conf import settings
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+def encode_cursor(pub_date, pk):
+    """Возвращает непрозрачный курсор для пары (pub_date, id)
+
+        Ключевые аргументы:
+        pub_date -- дата поста, на котором заканчивается страница
+        pk -- id этого поста
+        """
+    raw = f'{pub_date.isoformat()}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Возвращает пару (pub_date, id) или None для испорченного курсора
+
+        Ключевые аргументы:
+        token -- значение параметра ?after= или ?before=
+        """
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        pub_date, pk = raw.rsplit('|', 1)
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (binascii.Error, UnicodeError, ValueError):
+        return None
+    if pub_date is None:
+        return None
+    return pub_date, pk
+
+
+class KeysetPaginator(Paginator):
+    """Постраничный вывод по курсору (pub_date, id)
+
+        Страница выбирается условием по ключу сортировки, а не
+        LIMIT/OFFSET, поэтому любая страница стоит столько же,
+        сколько первая, а новые посты не сдвигают записи между
+        страницами. COUNT(*) выполняется только при явном обращении
+        к paginator.count.
+
+        Ключевые аргументы:
+        keys -- имена полей даты и id, по которым строится курсор
+        """
+
+    def __init__(self, object_list, per_page, keys=('pub_date', 'pk'),
+                 **kwargs):
+        self.keys = keys
+        date_key, pk_key = keys
+        object_list = object_list.order_by(f'-{date_key}', f'-{pk_key}')
+        super().__init__(object_list, per_page, **kwargs)
+        self.next_cursor = None
+        self.previous_cursor = None
+        self.number = 1
+
+    @property
+    def num_pages(self):
+        return self.number + (1 if self.next_cursor else 0)
+
+    @property
+    def page_range(self):
+        return range(1, self.num_pages + 1)
+
+    def get_page(self, after=None, before=None):
+        """Возвращает страницу после курсора after или перед before
+
+        Ключевые аргументы:
+        after -- курсор последнего поста предыдущей страницы
+        before -- курсор первого поста следующей страницы
+        """
+        limit = self.per_page + 1
+        after, before = decode_cursor(after), decode_cursor(before)
+        if before is not None:
+            rows = list(self.object_list.filter(
+                self._seek(before, 'gt')
+            ).order_by(*self.keys)[:limit])
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            has_next = bool(rows)
+        else:
+            queryset = self.object_list
+            if after is not None:
+                queryset = queryset.filter(self._seek(after, 'lt'))
+            rows = list(queryset[:limit])
+            has_next = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            has_previous = after is not None and bool(rows)
+        self.number = 2 if has_previous else 1
+        self.previous_cursor = self._cursor(rows[0]) if has_previous else None
+        self.next_cursor = self._cursor(rows[-1]) if has_next else None
+        return Page(rows, self.number, self)
+
+    def _seek(self, cursor, lookup):
+        date_key, pk_key = self.keys
+        pub_date, pk = cursor
+        # Нестрогое условие по дате ограничивает диапазон индекса,
+        # остальное отсекает записи с той же датой до курсора.
+        return Q(**{f'{date_key}__{lookup}e': pub_date}) & (
+            Q(**{f'{date_key}__{lookup}': pub_date})
+            | Q(**{f'{pk_key}__{lookup}': pk})
+        )
+
+    def _cursor(self, row):
+        date_key, pk_key = self.keys
+        return encode_cursor(getattr(row, date_key), getattr(row, pk_key))
+
+
+def get_page(request, post_list, keys=('pub_date', 'pk'), per_page=None):
+    """Возвращает страницу постов по курсору из запроса
+
+        Ключевые аргументы:
+        request -- запрос с параметрами ?after= или ?before=
+        post_list -- queryset постов
+        keys -- имена полей даты и id, по которым строится курсор
+        per_page -- размер страницы, по умолчанию PAGINATOR_PAGE
+        """
+    paginator = KeysetPaginator(
+        post_list,
+        per_page or settings.PAGINATOR_PAGE,
+        keys=keys
+    )
+    return paginator.get_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
@@ -0,0 +1,92 @@
+import re
+
+from django.db import connection
+
+from .models import Post
+
+FTS_TABLE = 'posts_post_fts'
+
+
+def fts_query(query):
+    """Превращает ввод пользователя в безопасный запрос FTS5
+
+        Каждое слово берется в кавычки, поэтому операторы и скобки
+        из ввода не ломают синтаксис MATCH. Слова объединяются по И.
+
+        Ключевые аргументы:
+        query -- строка поиска
+        """
+    return ' '.join(f'"{word}"' for word in re.findall(r'\w+', query))
+
+
+def fts_enabled():
+    return connection.vendor == 'sqlite'
+
+
+class PostSearchResults:
+    """Посты, найденные по тексту, в порядке релевантности
+
+        Поддерживает count() и срезы, поэтому отдается прямо в
+        Paginator. Каждый срез — один запрос к индексу FTS5 и один
+        запрос постов по id.
+
+        Ключевые аргументы:
+        query -- строка поиска
+        """
+
+    def __init__(self, query):
+        self.match = fts_query(query)
+
+    def count(self):
+        if not self.match:
+            return 0
+        if not fts_enabled():
+            return self._fallback().count()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT COUNT(*) FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s',
+                [self.match],
+            )
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            return self[item:item + 1][0]
+        start = item.start or 0
+        limit = item.stop - start
+        if not self.match or limit <= 0:
+            return []
+        if not fts_enabled():
+            return list(self._fallback()[start:item.stop])
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY rank LIMIT %s OFFSET %s',
+                [self.match, limit, start],
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        posts = Post.objects.for_feed().in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
+
+    def _fallback(self):
+        posts = Post.objects.for_feed()
+        for word in re.findall(r'\w+', self.match):
+            posts = posts.filter(text__icontains=word)
+        return posts
+
+
+def matching_ids(query):
+    """Возвращает SQL-подзапрос id постов, подходящих под запрос
+
+        Ключевые аргументы:
+        query -- строка поиска
+        """
+    return (
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        (fts_query(query),),
+    )
@@ -0,0 +1,189 @@
+from django.contrib.auth import get_user_model
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from yatube.sqlite import apply_pragmas
+
+from . import counters, feed, page_cache, stream, trending
+from .models import Comment, Follow, Group, Post, Suggestion, UserStats
+
+User = get_user_model()
+
+
+@receiver(connection_created)
+def tune_connection(sender, connection, **kwargs):
+    apply_pragmas(connection)
+
+
+@receiver(post_save, sender=Post)
+def post_fan_out(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        feed.fan_out(instance)
+
+
+@receiver(post_save, sender=Post)
+def post_publish(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        stream.publish(instance)
+
+
+@receiver(post_save, sender=Follow)
+def follow_backfill(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        feed.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Follow)
+def follow_drop_suggestion(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        dropped, _ = Suggestion.objects.filter(
+            user_id=instance.user_id,
+            candidate_id=instance.author_id,
+        ).delete()
+        if dropped:
+            page_cache.bump(page_cache.viewer_scope(instance.user_id))
+
+
+@receiver(post_delete, sender=Follow)
+def unfollow_prune(sender, instance, **kwargs):
+    feed.prune(instance.user_id, instance.author_id)
+
+
+def bump_pages(user_ids=(), group_ids=(), everywhere=False):
+    """Сбрасывает кэш страниц авторов, сообществ и, если нужно, главной
+
+        Ключевые аргументы:
+        user_ids -- id авторов, чьи профили изменились
+        group_ids -- id сообществ, чьи страницы изменились
+        everywhere -- сбросить ли главную страницу
+        """
+    scopes = [page_cache.GLOBAL_SCOPE] if everywhere else []
+    user_ids = [pk for pk in user_ids if pk is not None]
+    group_ids = [pk for pk in group_ids if pk is not None]
+    if user_ids:
+        scopes += map(page_cache.author_scope, User.objects.filter(
+            pk__in=user_ids
+        ).values_list('username', flat=True))
+    if group_ids:
+        scopes += map(page_cache.group_scope, Group.objects.filter(
+            pk__in=group_ids
+        ).values_list('slug', flat=True))
+    page_cache.bump(*scopes)
+
+
+@receiver(pre_save, sender=Post)
+def post_remember_group(sender, instance, raw=False, **kwargs):
+    if instance.pk is not None and not raw:
+        instance._previous_group_id = Post.objects.filter(
+            pk=instance.pk
+        ).values_list('group_id', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def post_changed(sender, instance, **kwargs):
+    bump_pages(
+        user_ids=(instance.author_id,),
+        group_ids=(instance.group_id,
+                   getattr(instance, '_previous_group_id', None)),
+        everywhere=True,
+    )
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    post = Post.objects.filter(
+        pk=instance.post_id
+    ).values_list('author_id', 'group_id').first() or (None, None)
+    author_id, group_id = post
+    bump_pages(
+        user_ids=(author_id,),
+        group_ids=(group_id,),
+        everywhere=True,
+    )
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    page_cache.bump(
+        page_cache.GLOBAL_SCOPE,
+        page_cache.group_scope(instance.slug),
+    )
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def follow_changed(sender, instance, **kwargs):
+    bump_pages(user_ids=(instance.user_id, instance.author_id))
+
+
+@receiver(post_save, sender=User)
+def user_stats_create(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Post)
+def post_count_add(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.adjust(instance.author_id, posts_count=1)
+
+
+@receiver(post_delete, sender=Post)
+def post_count_remove(sender, instance, **kwargs):
+    counters.adjust(instance.author_id, posts_count=-1)
+
+
+@receiver(post_save, sender=Follow)
+def follow_count_add(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.adjust(instance.author_id, followers_count=1)
+        counters.adjust(instance.user_id, following_count=1)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_count_remove(sender, instance, **kwargs):
+    counters.adjust(instance.author_id, followers_count=-1)
+    counters.adjust(instance.user_id, following_count=-1)
+
+
+@receiver(post_save, sender=Post)
+def post_trend(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        trending.record(
+            'post',
+            instance.pk,
+            instance.group_id,
+            instance.pub_date.timestamp(),
+        )
+    elif getattr(instance, '_previous_group_id', None) != instance.group_id:
+        trending.move_post(instance.pk, instance.group_id)
+
+
+@receiver(post_save, sender=Comment)
+def comment_trend(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        group_id = Post.objects.filter(
+            pk=instance.post_id
+        ).values_list('group_id', flat=True).first()
+        trending.record('comment', instance.post_id, group_id)
+
+
+@receiver(post_save, sender=Follow)
+def follow_trend(sender, instance, created, raw=False, **kwargs):
+    # Подписка засчитывается последнему посту автора, который,
+    # скорее всего, и привел подписчика.
+    if created and not raw:
+        latest = Post.objects.filter(
+            author_id=instance.author_id
+        ).order_by('-pub_date').values_list('pk', 'group_id').first()
+        if latest is not None:
+            trending.record('follow', *latest)
+            # Оценка видна на странице популярного и в боковой панели
+            # сообщества поста.
+            bump_pages(group_ids=(latest[1],), everywhere=True)
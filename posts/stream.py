@@ -0,0 +1,103 @@
+import json
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db import transaction
+from django.urls import reverse
+
+
+class Broker:
+    """Очередь событий в памяти процесса
+
+        Хранит последние события в кольцевом буфере, чтобы клиент,
+        переподключившийся с Last-Event-ID, получил пропущенное.
+        При нескольких процессах каждый видит только свои события.
+
+        Ключевые аргументы:
+        size -- сколько последних событий хранить
+        """
+
+    def __init__(self, size):
+        self._events = deque(maxlen=size)
+        self._condition = threading.Condition()
+        self.last_id = 0
+
+    def publish(self, group, data):
+        with self._condition:
+            self.last_id += 1
+            self._events.append((self.last_id, group, data))
+            self._condition.notify_all()
+
+    def wait(self, after, timeout):
+        """Возвращает события новее after, ожидая не дольше timeout
+
+            Ключевые аргументы:
+            after -- id последнего полученного события
+            timeout -- сколько секунд ждать новых событий
+            """
+        with self._condition:
+            if after > self.last_id:
+                after = self.last_id
+            self._condition.wait_for(
+                lambda: self.last_id > after, timeout
+            )
+            return [event for event in self._events if event[0] > after]
+
+
+broker = Broker(settings.STREAM_BUFFER)
+
+
+def serialize(post):
+    return json.dumps({
+        'id': post.pk,
+        'text': post.text,
+        'author': post.author.username,
+        'group': post.group.slug if post.group else None,
+        'pub_date': post.pub_date.isoformat(),
+        'url': reverse('post', kwargs={
+            'username': post.author.username,
+            'post_id': post.pk,
+        }),
+    }, ensure_ascii=False)
+
+
+def publish(post):
+    """Отправляет новый пост подписчикам потока после фиксации транзакции
+
+        Ключевые аргументы:
+        post -- только что созданный пост
+        """
+    transaction.on_commit(lambda: broker.publish(
+        post.group.slug if post.group else None,
+        serialize(post),
+    ))
+
+
+def events(group=None, last_id=None):
+    """Возвращает генератор сообщений Server-Sent Events
+
+        Соединение закрывается через STREAM_TIMEOUT секунд, браузер
+        переподключается сам и передает Last-Event-ID.
+
+        Ключевые аргументы:
+        group -- slug сообщества или None для всех постов
+        last_id -- id последнего события, полученного клиентом
+        """
+    yield f'retry: {settings.STREAM_RETRY}\n\n'
+    after = broker.last_id if last_id is None else last_id
+    deadline = time.monotonic() + settings.STREAM_TIMEOUT
+    while True:
+        left = deadline - time.monotonic()
+        if left <= 0:
+            return
+        found = broker.wait(after, min(left, settings.STREAM_HEARTBEAT))
+        if not found:
+            # Комментарий не дает прокси закрыть простаивающее соединение.
+            yield ': ping\n\n'
+            continue
+        for event_id, event_group, data in found:
+            after = event_id
+            if group is None or event_group == group:
+                yield f'id: {event_id}\nevent: post\ndata: {data}\n\n'
@@ -0,0 +1,172 @@
+import heapq
+import math
+from array import array
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from . import page_cache
+from .models import Follow, Suggestion
+
+BATCH_SIZE = 500
+# Вес подписок друзей относительно похожих по подпискам пользователей
+FRIENDS_WEIGHT = 1.0
+SIMILAR_WEIGHT = 2.0
+
+
+class Adjacency:
+    """Разреженная матрица смежности в формате CSR
+
+        Соседи вершины row лежат в indices[indptr[row]:indptr[row + 1]].
+        Вершины нумеруются подряд, ids переводит номер в id пользователя.
+
+        Ключевые аргументы:
+        pairs -- пары (откуда, куда), отсортированные по первому id
+        rows -- словарь id пользователя -> номер вершины
+        """
+
+    def __init__(self, pairs, rows):
+        self.indptr = array('l', [0] * (len(rows) + 1))
+        self.indices = array('l')
+        for source, target in pairs:
+            self.indices.append(rows[target])
+            self.indptr[rows[source] + 1] += 1
+        for row in range(len(rows)):
+            self.indptr[row + 1] += self.indptr[row]
+
+    def neighbours(self, row):
+        return self.indices[self.indptr[row]:self.indptr[row + 1]]
+
+    def degree(self, row):
+        return self.indptr[row + 1] - self.indptr[row]
+
+
+def load_graph():
+    """Возвращает ids пользователей и матрицы подписок и подписчиков
+
+        Все ребра читаются одним запросом без создания объектов моделей.
+        """
+    edges = list(Follow.objects.order_by(
+        'user_id',
+        'author_id'
+    ).values_list('user_id', 'author_id'))
+    ids = sorted({pk for edge in edges for pk in edge})
+    rows = {pk: row for row, pk in enumerate(ids)}
+    following = Adjacency(edges, rows)
+    followers = Adjacency(
+        sorted((author, user) for user, author in edges),
+        rows,
+    )
+    return ids, following, followers
+
+
+def score(row, following, followers, limit):
+    """Возвращает лучшие кандидаты для одной вершины графа
+
+        Оценка складывается из подписок тех, на кого подписан
+        пользователь (друзья друзей), и подписок пользователей
+        с похожим набором подписок, взвешенных косинусной мерой.
+
+        Ключевые аргументы:
+        row -- номер вершины пользователя
+        following -- матрица подписок
+        followers -- матрица подписчиков
+        limit -- сколько кандидатов вернуть
+        """
+    own = following.neighbours(row)
+    if not own:
+        return []
+    excluded = set(own)
+    excluded.add(row)
+    scores = defaultdict(float)
+    mutual = defaultdict(int)
+    overlap = defaultdict(int)
+    for author in own:
+        for candidate in following.neighbours(author):
+            scores[candidate] += FRIENDS_WEIGHT
+            mutual[candidate] += 1
+        for neighbour in followers.neighbours(author):
+            if neighbour != row:
+                overlap[neighbour] += 1
+    norm = math.sqrt(len(own))
+    for neighbour, common in overlap.items():
+        weight = SIMILAR_WEIGHT * common / (
+            norm * math.sqrt(following.degree(neighbour))
+        )
+        for candidate in following.neighbours(neighbour):
+            scores[candidate] += weight
+    best = heapq.nsmallest(
+        limit,
+        ((-value, candidate) for candidate, value in scores.items()
+         if candidate not in excluded),
+    )
+    return [(candidate, -value, mutual[candidate])
+            for value, candidate in best]
+
+
+def build(limit=None, chunk_size=1000):
+    """Пересчитывает рекомендации всех пользователей по графу подписок
+
+        Возвращает число пользователей с рекомендациями.
+
+        Ключевые аргументы:
+        limit -- сколько рекомендаций хранить на пользователя
+        chunk_size -- сколько пользователей записывать за транзакцию
+        """
+    if limit is None:
+        limit = settings.SUGGESTIONS_STORED
+    ids, following, followers = load_graph()
+    chunk, users = [], 0
+    for row, user_id in enumerate(ids):
+        chunk.append((user_id, score(row, following, followers, limit)))
+        if len(chunk) >= chunk_size:
+            users += _store(chunk, ids)
+            chunk = []
+    users += _store(chunk, ids)
+    # Пользователи без подписок не попали в граф.
+    stale = Suggestion.objects.exclude(user_id__in=ids)
+    page_cache.bump(*map(page_cache.viewer_scope, set(
+        stale.values_list('user_id', flat=True)
+    )))
+    stale.delete()
+    return users
+
+
+@transaction.atomic
+def _store(chunk, ids):
+    Suggestion.objects.filter(
+        user_id__in=[user_id for user_id, _ in chunk]
+    ).delete()
+    Suggestion.objects.bulk_create(
+        (Suggestion(
+            user_id=user_id,
+            candidate_id=ids[candidate],
+            rank=rank,
+            score=round(value, 6),
+            mutual=mutual,
+        )
+            for user_id, best in chunk
+            for rank, (candidate, value, mutual) in enumerate(best, 1)),
+        batch_size=BATCH_SIZE,
+    )
+    # Профили отдают 304 по версии рекомендаций зрителя.
+    page_cache.bump(*(page_cache.viewer_scope(user_id)
+                      for user_id, _ in chunk))
+    return sum(1 for _, best in chunk if best)
+
+
+def for_user(user, limit=None):
+    """Возвращает сохраненные рекомендации одним запросом по индексу
+
+        Ключевые аргументы:
+        user -- пользователь, для которого нужны рекомендации
+        limit -- сколько рекомендаций вернуть
+        """
+    if not user.is_authenticated:
+        return Suggestion.objects.none()
+    if limit is None:
+        limit = settings.SUGGESTIONS_SHOWN
+    return Suggestion.objects.filter(user=user).select_related(
+        'candidate'
+    ).order_by('rank')[:limit]
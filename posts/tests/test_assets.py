@@ -0,0 +1,124 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.utils.http import http_date
+
+from yatube.assets import check_media_offload, is_hashed
+
+STYLE = b'body { color: black; }\n' * 40
+
+
+class YatubeStaticPipelineTests(SimpleTestCase):
+    def setUp(self):
+        self.source = tempfile.mkdtemp()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.source)
+        self.addCleanup(shutil.rmtree, self.root)
+        os.makedirs(os.path.join(self.source, 'css'))
+        with open(os.path.join(self.source, 'css', 'site.css'), 'wb') as f:
+            f.write(STYLE)
+        settings_override = override_settings(
+            STATIC_ROOT=self.root,
+            STATICFILES_DIRS=[self.source],
+            STATICFILES_STORAGE=(
+                'yatube.storage.CompressedManifestStaticFilesStorage'
+            ),
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        call_command(
+            'collectstatic',
+            interactive=False,
+            verbosity=0,
+            ignore_patterns=['admin'],
+        )
+        self.hashed = staticfiles_storage.hashed_files['css/site.css']
+
+    def test_collectstatic_precompresses(self):
+        """collectstatic кладет рядом с файлом с хешем копию в gzip."""
+        self.assertTrue(is_hashed(self.hashed))
+        self.assertFalse(is_hashed('css/site.css'))
+        with open(os.path.join(self.root, self.hashed + '.gz'), 'rb') as f:
+            self.assertEqual(gzip.decompress(f.read()), STYLE)
+
+    def test_hashed_file_served_immutable(self):
+        """Файл с хешем отдается сжатым и кэшируется навсегда."""
+        response = Client().get(
+            settings.STATIC_URL + self.hashed,
+            HTTP_ACCEPT_ENCODING='gzip, deflate',
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+        body = b''.join(response.streaming_content)
+        self.assertEqual(gzip.decompress(body), STYLE)
+        response = Client().get(settings.STATIC_URL + 'css/site.css')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertNotIn('immutable', response['Cache-Control'])
+
+
+class YatubeMediaOffloadTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        os.makedirs(os.path.join(self.root, 'posts'))
+        self.path = os.path.join(self.root, 'posts', 'photo.jpg')
+        with open(self.path, 'wb') as f:
+            f.write(b'jpeg')
+        self.url = settings.MEDIA_URL + 'posts/photo.jpg'
+
+    def test_offload_headers(self):
+        """Загрузки отдает веб-сервер по заголовку, тело ответа пустое."""
+        headers = {
+            'x-accel-redirect': (
+                'X-Accel-Redirect',
+                settings.MEDIA_ACCEL_PREFIX + 'posts/photo.jpg',
+            ),
+            'x-sendfile': ('X-Sendfile', self.path),
+        }
+        for offload, (header, value) in headers.items():
+            with self.subTest(offload=offload), override_settings(
+                MEDIA_ROOT=self.root,
+                MEDIA_OFFLOAD=offload,
+            ):
+                response = Client().get(self.url)
+                self.assertEqual(response[header], value)
+                self.assertEqual(response['Content-Type'], 'image/jpeg')
+                self.assertEqual(response.content, b'')
+
+    def test_not_modified_keeps_cache_headers(self):
+        """Ответ 304 несет те же Cache-Control и Vary, что и файл."""
+        with override_settings(MEDIA_ROOT=self.root, MEDIA_OFFLOAD=''):
+            response = Client().get(
+                self.url,
+                HTTP_IF_MODIFIED_SINCE=http_date(),
+            )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(
+            response['Cache-Control'],
+            f'public, max-age={settings.MEDIA_MAX_AGE}'
+        )
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_unknown_offload_rejected_by_check(self):
+        """Неизвестный MEDIA_OFFLOAD отклоняет системная проверка."""
+        self.assertEqual(check_media_offload(None), [])
+        with override_settings(MEDIA_OFFLOAD='sendfile'):
+            errors = check_media_offload(None)
+        self.assertEqual([error.id for error in errors], ['yatube.E001'])
+
+    @override_settings(MEDIA_OFFLOAD='x-accel-redirect')
+    def test_missing_and_outside_files(self):
+        """Несуществующий файл и выход за MEDIA_ROOT дают 404."""
+        with override_settings(MEDIA_ROOT=self.root):
+            for path in ('posts/missing.jpg', '../etc/passwd'):
+                with self.subTest(path=path):
+                    response = Client().get(settings.MEDIA_URL + path)
+                    self.assertEqual(response.status_code, 404)
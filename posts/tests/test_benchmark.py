@@ -0,0 +1,86 @@
+import random
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+
+from posts.benchmark import file_test_db, measure, percentile, seed
+from posts.management.commands.benchmark import Command
+from posts.models import Comment, FeedItem, Follow, Post, UserStats
+
+from . import constants
+
+
+class YatubeBenchmarkTests(TestCase):
+    def test_seed_fills_tables(self):
+        """seed создает заданные объемы и пересобирает ленты и счетчики."""
+        seed(10, 2, 30, 40, 15, random.Random(1))
+        self.assertEqual(Post.objects.count(), 30)
+        self.assertEqual(Comment.objects.count(), 40)
+        self.assertEqual(Follow.objects.count(), 15)
+        self.assertTrue(FeedItem.objects.exists())
+        self.assertEqual(UserStats.objects.count(), 10)
+
+    def test_measure_reports_metrics(self):
+        """measure возвращает перцентили, число запросов и размер."""
+        report = measure(Client(), lambda: constants.HOME_PAGE, 3)
+        self.assertEqual(report['requests'], 3)
+        self.assertGreater(report['bytes'], 0)
+        self.assertLessEqual(report['p50_ms'], report['p95_ms'])
+
+    def test_percentile(self):
+        """Перцентиль считается по ближайшему рангу."""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.95), 95)
+
+
+class YatubeBenchmarkCachesTests(TestCase):
+    def setUp(self):
+        caches['shared'].set('live', 'value')
+        self.addCleanup(caches['shared'].delete, 'live')
+
+    def test_command_keeps_live_cache(self):
+        """benchmark очищает только свой кэш, а не кэш сервера."""
+        with mock.patch.object(
+            Command,
+            'run_benchmark',
+            side_effect=lambda options: cache.clear() or {},
+        ):
+            call_command('benchmark', stdout=StringIO())
+        self.assertEqual(caches['shared'].get('live'), 'value')
+
+    def test_file_test_db_keeps_live_cache(self):
+        """Внутри file_test_db кэш и сессии сервера недоступны."""
+        creation = connection.creation
+        with mock.patch.object(creation, 'create_test_db'), \
+                mock.patch.object(creation, 'destroy_test_db'):
+            with file_test_db():
+                self.assertIsNone(caches['shared'].get('live'))
+                caches['sessions'].set('benchmark', 'session')
+                cache.clear()
+        self.assertEqual(caches['shared'].get('live'), 'value')
+        self.assertIsNone(caches['sessions'].get('benchmark'))
+
+
+class YatubeSqliteTuningTests(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_connection_tuned(self):
+        """Новое соединение получает PRAGMA из SQLITE_PRAGMAS."""
+        for name in ('busy_timeout', 'cache_size'):
+            with self.subTest(name=name):
+                self.assertEqual(
+                    self.pragma(name),
+                    settings.SQLITE_PRAGMAS[name]
+                )
+        # NORMAL
+        self.assertEqual(self.pragma('synchronous'), 1)
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
@@ -0,0 +1,131 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import SimpleTestCase
+
+from yatube.cache import TieredCache
+
+
+class YatubeTieredCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def events(self):
+        return cache.stats()
+
+    def test_tests_use_isolated_caches(self):
+        """Тесты не трогают файловый кэш в CACHE_DIR."""
+        self.assertIsInstance(caches['shared'], LocMemCache)
+        self.assertNotIn(
+            settings.CACHE_DIR,
+            settings.CACHES['shared']['LOCATION']
+        )
+        self.assertNotIn('LOCK_DIR', settings.CACHES['default']['OPTIONS'])
+
+    def test_local_tier_serves_repeated_reads(self):
+        """Повторное чтение берется из памяти процесса."""
+        cache.set('key', 'value')
+        before = self.events().get('local_hits', 0)
+        self.assertEqual(cache.get('key'), 'value')
+        self.assertEqual(self.events()['local_hits'], before + 1)
+        self.assertIsNone(cache.get('missing'))
+
+    def test_shared_tier_visible_to_other_process(self):
+        """Значение другого процесса читается из общего кэша, удаление
+        сбрасывает оба уровня."""
+        cache._shared.set('key', 'shared')
+        before = self.events().get('shared_hits', 0)
+        self.assertEqual(cache.get('key'), 'shared')
+        self.assertEqual(self.events()['shared_hits'], before + 1)
+        cache.delete('key')
+        self.assertIsNone(cache.get('key'))
+
+    def test_get_or_set_computes_once(self):
+        """get_or_set из многих потоков вычисляет значение один раз."""
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.05)
+            return 'value'
+
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(
+                    cache.get_or_set('hot', compute, 60)
+                )
+            )
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['value'] * 8)
+        self.assertEqual(len(calls), 1)
+
+    def test_get_or_set_waits_for_other_process(self):
+        """Пока другой процесс держит замок, get_or_set ждет его
+        результат вместо пересчета."""
+        cache._shared.add('hot:lock', 1, 30)
+
+        def finish():
+            time.sleep(0.1)
+            cache._shared.set('hot', 'other')
+
+        threading.Thread(target=finish).start()
+        value = cache.get_or_set('hot', lambda: 'mine', 60)
+        self.assertEqual(value, 'other')
+
+
+class YatubeCacheFileLockTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.lock_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.lock_dir)
+        self.cache = TieredCache('shared', {'OPTIONS': {
+            'LOCK_DIR': self.lock_dir,
+            'LOCK_TIMEOUT': 30,
+        }})
+
+    def test_lock_file_is_exclusive(self):
+        """Замок вычисления достается одному владельцу до снятия."""
+        self.assertTrue(self.cache._acquire('hot', None))
+        self.assertFalse(self.cache._acquire('hot', None))
+        self.assertTrue(self.cache._acquire('cold', None))
+        self.cache._release('hot', None)
+        self.assertTrue(self.cache._acquire('hot', None))
+
+    def test_stale_lock_file_removed(self):
+        """Замок упавшего процесса снимается через LOCK_TIMEOUT."""
+        self.assertTrue(self.cache._acquire('hot', None))
+        path = self.cache._lock_path('hot', None)
+        old = time.time() - 60
+        os.utime(path, (old, old))
+        self.assertTrue(self.cache._acquire('hot', None))
+
+    def test_get_or_set_waits_for_lock_file(self):
+        """Пока другой процесс держит файл-замок, get_or_set ждет его
+        результат, а после вычисления замок снимается."""
+        self.cache._acquire('hot', None)
+
+        def finish():
+            time.sleep(0.1)
+            self.cache._shared.set('hot', 'other')
+
+        threading.Thread(target=finish).start()
+        value = self.cache.get_or_set('hot', lambda: 'mine', 60)
+        self.assertEqual(value, 'other')
+        self.cache._release('hot', None)
+        self.assertEqual(
+            self.cache.get_or_set('cold', lambda: 'mine', 60),
+            'mine'
+        )
+        self.assertEqual(os.listdir(self.lock_dir), [])
@@ -0,0 +1,102 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import FeedItem, Follow, Post, User, UserStats
+
+from . import constants
+
+
+class YatubeFeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=constants.username)
+        cls.author = User.objects.create_user(username=constants.username2)
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    def test_feed_follows_posts_and_subscriptions(self):
+        """Лента заполняется при подписке, новом посте и чистится при
+        отписке."""
+        old_post = Post.objects.create(text=constants.text, author=self.author)
+        Follow.objects.create(user=self.user, author=self.author)
+        new_post = Post.objects.create(
+            text=constants.text_other,
+            author=self.author
+        )
+        response = self.authorized_client.get(constants.FOLLOW)
+        self.assertEqual(
+            [post.id for post in response.context['page']],
+            [new_post.id, old_post.id]
+        )
+        Follow.objects.filter(user=self.user, author=self.author).delete()
+        self.assertFalse(FeedItem.objects.filter(user=self.user).exists())
+
+    def test_rebuild_feed_command(self):
+        """Команда rebuild_feed восстанавливает ленту по подпискам."""
+        Follow.objects.create(user=self.user, author=self.author)
+        Post.objects.bulk_create([
+            Post(text=constants.text, author=self.author) for i in range(3)
+        ])
+        self.assertEqual(FeedItem.objects.count(), 0)
+        call_command('rebuild_feed', stdout=StringIO())
+        self.assertEqual(FeedItem.objects.filter(user=self.user).count(), 3)
+
+
+class YatubeCountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=constants.username)
+        cls.author = User.objects.create_user(username=constants.username2)
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    def test_counters_follow_writes(self):
+        """Счетчики меняются при подписке, отписке и новом посте."""
+        self.authorized_client.get(reverse(
+            'profile_follow',
+            kwargs={'username': constants.username2}
+        ))
+        Post.objects.create(text=constants.text, author=self.author)
+        author_stats = UserStats.objects.get(user=self.author)
+        self.assertEqual(
+            (author_stats.posts_count, author_stats.followers_count),
+            (1, 1)
+        )
+        self.assertEqual(
+            UserStats.objects.get(user=self.user).following_count,
+            1
+        )
+        self.authorized_client.get(reverse(
+            'profile_unfollow',
+            kwargs={'username': constants.username2}
+        ))
+        author_stats.refresh_from_db()
+        self.assertEqual(author_stats.followers_count, 0)
+
+    def test_profile_card_shows_counters(self):
+        """Карточка профиля выводит счетчики без COUNT-запросов."""
+        Follow.objects.create(user=self.user, author=self.author)
+        response = self.authorized_client.get(reverse(
+            'profile',
+            kwargs={'username': constants.username2}
+        ))
+        self.assertContains(response, 'Подписчиков: 1')
+        self.assertEqual(response.context['all_post'], 0)
+
+    def test_repair_counters_command(self):
+        """Команда repair_counters чинит разошедшиеся счетчики."""
+        Post.objects.bulk_create([
+            Post(text=constants.text, author=self.author) for i in range(3)
+        ])
+        UserStats.objects.filter(user=self.user).delete()
+        call_command('repair_counters', '--chunk-size=1', stdout=StringIO())
+        self.assertEqual(
+            UserStats.objects.get(user=self.author).posts_count,
+            3
+        )
+        self.assertTrue(UserStats.objects.filter(user=self.user).exists())
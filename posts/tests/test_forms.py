@@ -1,11 +1,21 @@
 import shutil
 import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
 
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase, override_settings
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from PIL import Image
+from sorl.thumbnail import default
+from sorl.thumbnail.images import ImageFile
 
+from posts import thumbnails
 from posts.models import Group, Post, User
 
 from . import constants
@@ -139,3 +149,108 @@ class YatubeCreateFormTests(TestCase):
             'image',
             'Отправленный файл пуст.'
         )
+
+    @override_settings(POST_IMAGE_MAX_SIZE=300, POST_IMAGE_FORMAT='WEBP')
+    def test_upload_image_normalized(self):
+        """Загруженное изображение уменьшается, поворачивается по EXIF
+        и сохраняется без метаданных."""
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        exif[0x010F] = 'TestCamera'
+        content = BytesIO()
+        Image.new('RGB', (600, 200), (200, 10, 10)).save(
+            content,
+            'JPEG',
+            exif=exif.tobytes()
+        )
+        self.authorized_client.post(
+            constants.NEW_POST_PAGE,
+            data={
+                'text': constants.text_other,
+                'image': SimpleUploadedFile(
+                    name='photo.jpg',
+                    content=content.getvalue(),
+                    content_type='image/jpeg'
+                ),
+            },
+        )
+        post = Post.objects.get(text=constants.text_other)
+        self.assertTrue(post.image.name.endswith('photo.webp'))
+        self.assertEqual((post.image_width, post.image_height), (100, 300))
+        with Image.open(post.image.path) as stored:
+            self.assertEqual(stored.format, 'WEBP')
+            self.assertEqual(stored.size, (100, 300))
+            self.assertEqual(dict(stored.getexif()), {})
+
+    @override_settings(POST_IMAGE_MAX_SIZE=300, POST_IMAGE_FORMAT='JPEG')
+    def test_model_save_normalizes_image(self):
+        """Изображение нормализуется и при записи поста в обход формы,
+        а повторное сохранение файл не пережимает."""
+        content = BytesIO()
+        Image.new('RGB', (900, 600), (10, 10, 200)).save(content, 'PNG')
+        post = Post.objects.create(
+            text=constants.text_other,
+            author=self.user,
+            image=SimpleUploadedFile(
+                name='direct.png',
+                content=content.getvalue(),
+                content_type='image/png'
+            ),
+        )
+        self.assertTrue(post.image.name.endswith('direct.jpg'))
+        self.assertEqual((post.image_width, post.image_height), (300, 200))
+        name = post.image.name
+        post.text = constants.text
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual(post.image.name, name)
+        self.assertEqual((post.image_width, post.image_height), (300, 200))
+        post.image = None
+        post.save()
+        self.assertIsNone(post.image_width)
+
+    def test_warm_thumbnails_command(self):
+        """Команда warm_thumbnails заранее создает миниатюры постов."""
+        post = Post.objects.create(
+            text=constants.text,
+            author=self.user,
+            image=SimpleUploadedFile(
+                name='warm.gif',
+                content=constants.small_gif,
+                content_type='image/gif'
+            ),
+        )
+        source = ImageFile(post.image)
+        self.assertIsNone(default.kvstore.get(source))
+        call_command('warm_thumbnails', '--workers=1', stdout=StringIO())
+        self.assertIsNotNone(default.kvstore.get(source))
+
+    def test_new_post_form_without_transaction(self):
+        """Форма нового поста и ошибки в ней не открывают транзакцию."""
+        for data in (None, {'text': ''}):
+            with self.subTest(data=data):
+                with CaptureQueriesContext(connection) as captured:
+                    if data is None:
+                        self.authorized_client.get(constants.NEW_POST_PAGE)
+                    else:
+                        self.authorized_client.post(
+                            constants.NEW_POST_PAGE,
+                            data=data
+                        )
+                self.assertFalse([
+                    query for query in captured.captured_queries
+                    if query['sql'].startswith('SAVEPOINT')
+                ])
+
+
+@override_settings(THUMBNAIL_WARM_ASYNC=False)
+class YatubeThumbnailErrorTests(TransactionTestCase):
+    def test_sync_warm_error_logged(self):
+        """Ошибка миниатюр после фиксации пишется в лог, а не падает."""
+        with mock.patch.object(
+            thumbnails,
+            'warm',
+            side_effect=OSError('broken image'),
+        ), self.assertLogs('posts.thumbnails', 'ERROR'):
+            with transaction.atomic():
+                thumbnails.schedule('posts/broken.jpg')
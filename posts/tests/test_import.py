@@ -0,0 +1,99 @@
+import json
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from posts import trending
+from posts.models import (Comment, FeedItem, Follow, Group, GroupTrend, Post,
+                          PostTrend, User, UserStats)
+
+from . import constants
+
+ROWS = (
+    {'id': 10, 'text': constants.text, 'author': constants.username,
+     'group': constants.slug, 'pub_date': '2015-03-01T10:00:00+00:00'},
+    {'id': 11, 'text': constants.text_other, 'author': constants.username},
+    {'type': 'comment', 'post': 10, 'author': constants.username2,
+     'text': constants.text_comment, 'created': '2015-03-02T10:00:00'},
+    {'type': 'comment', 'post': 99, 'author': constants.username2,
+     'text': constants.text_comment},
+    {'type': 'follow', 'user': constants.username2,
+     'author': constants.username},
+)
+
+
+class YatubeImportTests(TestCase):
+    def import_lines(self, lines):
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson') as source:
+            source.write('\n'.join(lines))
+            source.flush()
+            call_command(
+                'import_posts',
+                source.name,
+                '--chunk-size=2',
+                stdout=StringIO()
+            )
+
+    def test_import_posts_command(self):
+        """import_posts создает записи, авторов, группы и сохраняет даты."""
+        self.import_lines(json.dumps(row) for row in ROWS)
+        self.assertEqual(Post.objects.count(), 2)
+        post = Post.objects.get(text=constants.text)
+        self.assertEqual(post.pub_date.year, 2015)
+        self.assertEqual(post.group, Group.objects.get(slug=constants.slug))
+        self.assertEqual(Comment.objects.get().post, post)
+        self.assertEqual(Comment.objects.get().created.year, 2015)
+        self.assertTrue(Follow.objects.filter(
+            user__username=constants.username2,
+            author__username=constants.username,
+        ).exists())
+        reader = User.objects.get(username=constants.username2)
+        self.assertEqual(FeedItem.objects.filter(user=reader).count(), 2)
+        self.assertEqual(
+            Post._meta.get_field('pub_date').auto_now_add,
+            True
+        )
+
+    def test_import_error_keeps_derived_tables(self):
+        """Ошибка после записанных пачек не оставляет ленты и счетчики
+        устаревшими."""
+        lines = [json.dumps(row) for row in ROWS]
+        with self.assertRaises(CommandError):
+            self.import_lines(lines[:4] + ['{'] + lines[4:])
+        author = User.objects.get(username=constants.username)
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(UserStats.objects.get(user=author).posts_count, 2)
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(FeedItem.objects.exists())
+
+    def test_import_keeps_trending_scores(self):
+        """Импорт дополняет оценки популярности, а не пересчитывает их."""
+        author = User.objects.create(username=constants.username)
+        group = Group.objects.create(
+            title=constants.title,
+            slug=constants.slug,
+            description=constants.description
+        )
+        post = Post.objects.create(text=constants.text, author=author)
+        # Оценка от подписки: rebuild ее бы потерял.
+        score = trending.log_weight('follow')
+        PostTrend.objects.filter(post=post).update(score=score)
+        GroupTrend.objects.create(group=group, score=score)
+        self.import_lines([
+            json.dumps({'id': 1, 'text': constants.text_other,
+                        'author': constants.username2,
+                        'group': constants.slug}),
+            json.dumps({'type': 'comment', 'post': 1,
+                        'author': constants.username,
+                        'text': constants.text_comment}),
+        ])
+        self.assertEqual(PostTrend.objects.get(post=post).score, score)
+        self.assertGreater(GroupTrend.objects.get(group=group).score, score)
+        imported = Post.objects.get(text=constants.text_other)
+        self.assertEqual(
+            PostTrend.objects.get(post=imported).group,
+            group
+        )
@@ -0,0 +1,93 @@
+import re
+import threading
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Post, User
+from yatube.metrics import Histogram
+
+from . import constants
+
+METRICS = reverse('metrics')
+
+
+def sample(body, name, view):
+    match = re.search(
+        rf'^{name}\{{view="{view}"\}} (\S+)$', body, re.MULTILINE
+    )
+    return float(match.group(1)) if match else 0
+
+
+class YatubeMetricsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=constants.username)
+        Post.objects.create(text=constants.text, author=cls.user)
+        cls.guest_client = Client()
+
+    def setUp(self):
+        cache.clear()
+
+    def metrics(self):
+        response = self.guest_client.get(METRICS)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        return response.content.decode()
+
+    def test_metrics_by_view(self):
+        """/metrics отдает гистограммы по имени маршрута."""
+        before = self.metrics()
+        self.guest_client.get(constants.HOME_PAGE)
+        after = self.metrics()
+        for name in (
+            'yatube_request_duration_seconds_count',
+            'yatube_db_queries_count',
+            'yatube_template_duration_seconds_count',
+            'yatube_response_size_bytes_count',
+        ):
+            with self.subTest(name=name):
+                self.assertEqual(
+                    sample(after, name, 'index'),
+                    sample(before, name, 'index') + 1
+                )
+        for name in (
+            'yatube_db_queries_sum',
+            'yatube_template_duration_seconds_sum',
+            'yatube_response_size_bytes_sum',
+        ):
+            with self.subTest(name=name):
+                self.assertGreater(
+                    sample(after, name, 'index'),
+                    sample(before, name, 'index')
+                )
+        self.assertRegex(
+            after,
+            r'yatube_cache_events_total\{cache="default",event="\w+"\} \d+'
+        )
+        self.assertRegex(
+            after,
+            r'yatube_requests_total\{view="index",method="GET",'
+            r'status="200"\} \d+'
+        )
+
+    def test_histogram_thread_safe(self):
+        """Гистограмма не теряет наблюдения при записи из потоков."""
+        histogram = Histogram('test_seconds', 'test', ('view',), (1, 10))
+
+        def observe():
+            for value in range(20):
+                histogram.observe('index', value=value)
+
+        threads = [threading.Thread(target=observe) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        lines = list(histogram.samples())
+        self.assertIn('test_seconds_bucket{view="index",le="1"} 16', lines)
+        self.assertIn('test_seconds_bucket{view="index",le="10"} 88', lines)
+        self.assertIn('test_seconds_bucket{view="index",le="+Inf"} 160', lines)
+        self.assertIn('test_seconds_count{view="index"} 160', lines)
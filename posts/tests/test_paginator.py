@@ -0,0 +1,73 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.test import Client, TestCase
+
+from posts.models import Group, Post, User
+
+from . import constants
+
+
+class YatubeKeysetPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=constants.username)
+        cls.group = Group.objects.create(
+            title=constants.title,
+            slug=constants.slug,
+            description=constants.description,
+        )
+        Post.objects.bulk_create([Post(
+            text=f'{constants.text} {i}',
+            author=cls.user,
+            group=cls.group) for i in range(settings.PAGINATOR_PAGE + 3)])
+        cls.guest_client = Client()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_next_and_previous_cursor(self):
+        """Курсоры ?after= и ?before= листают страницы без пропусков."""
+        first = self.guest_client.get(constants.group_page).context['page']
+        self.assertEqual(len(first), settings.PAGINATOR_PAGE)
+        self.assertFalse(first.has_previous())
+        self.assertTrue(first.has_next())
+        second = self.guest_client.get(
+            constants.group_page,
+            {'after': first.paginator.next_cursor}
+        ).context['page']
+        self.assertEqual(len(second), 3)
+        self.assertTrue(second.has_previous())
+        self.assertFalse(second.has_next())
+        ids = [post.id for post in first] + [post.id for post in second]
+        self.assertEqual(len(set(ids)), Post.objects.count())
+        back = self.guest_client.get(
+            constants.group_page,
+            {'before': second.paginator.previous_cursor}
+        ).context['page']
+        self.assertEqual(
+            [post.id for post in back],
+            [post.id for post in first]
+        )
+
+    def test_new_post_does_not_shift_page(self):
+        """Новый пост не сдвигает записи следующей страницы."""
+        first = self.guest_client.get(constants.profile_page).context['page']
+        cursor = first.paginator.next_cursor
+        expected = [post.id for post in self.guest_client.get(
+            constants.profile_page, {'after': cursor}
+        ).context['page']]
+        Post.objects.create(text=constants.text_other, author=self.user)
+        actual = [post.id for post in self.guest_client.get(
+            constants.profile_page, {'after': cursor}
+        ).context['page']]
+        self.assertEqual(expected, actual)
+
+    def test_broken_cursor_returns_first_page(self):
+        """Испорченный курсор возвращает первую страницу."""
+        response = self.guest_client.get(
+            constants.group_page,
+            {'after': 'not-a-cursor'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context['page'].has_previous())
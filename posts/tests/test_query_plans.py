@@ -0,0 +1,87 @@
+import re
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post, User
+
+from . import constants
+
+FEED_TABLES = re.compile(r'FROM "posts_(post|feeditem|comment|follow)"')
+FULL_SCAN = re.compile(r'^SCAN (TABLE )?\S+$')
+INDEX_SCAN = re.compile(r'^SCAN ')
+
+
+class YatubeQueryPlanTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=constants.username)
+        cls.author = User.objects.create_user(username=constants.username2)
+        cls.group = Group.objects.create(
+            title=constants.title,
+            slug=constants.slug,
+            description=constants.description,
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        for i in range(15):
+            cls.post = Post.objects.create(
+                text=constants.text,
+                author=cls.author,
+                group=cls.group,
+            )
+            cls.post.comments.create(
+                author=cls.user,
+                text=constants.text_comment
+            )
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+
+    def feed_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        plans = [(query['sql'], FULL_SCAN)
+                 for query in queries.captured_queries]
+        paginator = getattr(response.context.get('page'), 'paginator', None)
+        if paginator is not None and paginator.next_cursor:
+            with CaptureQueriesContext(connection) as queries:
+                self.authorized_client.get(
+                    url,
+                    {'after': paginator.next_cursor}
+                )
+            # Страница по курсору должна искать диапазон, а не
+            # сканировать индекс с начала.
+            plans += [(query['sql'], INDEX_SCAN)
+                      for query in queries.captured_queries]
+        return [(sql, forbidden) for sql, forbidden in plans
+                if FEED_TABLES.search(sql)]
+
+    def test_feed_queries_use_indexes(self):
+        """Запросы лент не сканируют таблицы и не сортируют во временном
+        B-дереве."""
+        urls = (
+            constants.HOME_PAGE,
+            constants.group_page,
+            reverse('profile', kwargs={'username': constants.username2}),
+            constants.FOLLOW,
+            reverse('post', kwargs={
+                'username': constants.username2,
+                'post_id': self.post.id,
+            }),
+        )
+        for url in urls:
+            for sql, forbidden in self.feed_queries(url):
+                for step in self.explain(sql):
+                    with self.subTest(url=url, step=step, sql=sql):
+                        self.assertNotRegex(step, forbidden)
+                        self.assertNotIn('TEMP B-TREE', step)
@@ -0,0 +1,55 @@
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from posts.models import Post
+from yatube.db_router import PIN_COOKIE, ReplicaMiddleware, ReplicaRouter
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'], REPLICA_PIN_SECONDS=5)
+class YatubeReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def handle(self, request, write=False):
+        """Проходит через middleware и запоминает базу для чтения."""
+        used = {}
+
+        def view(request):
+            if write:
+                self.router.db_for_write(Post)
+            used['read'] = self.router.db_for_read(Post)
+            return HttpResponse()
+
+        response = ReplicaMiddleware(view)(request)
+        return used['read'], response
+
+    def test_get_reads_replica(self):
+        """GET-запрос читает реплику."""
+        read, response = self.handle(self.factory.get('/'))
+        self.assertEqual(read, 'replica1')
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_write_pins_primary(self):
+        """После записи чтение идет в основную базу и ставится cookie."""
+        read, response = self.handle(self.factory.post('/'), write=True)
+        self.assertEqual(read, 'default')
+        self.assertIn(PIN_COOKIE, response.cookies)
+        request = self.factory.get('/')
+        request.COOKIES[PIN_COOKIE] = response.cookies[PIN_COOKIE].value
+        read, response = self.handle(request)
+        self.assertEqual(read, 'default')
+
+    def test_write_in_get_switches_to_primary(self):
+        """Запись посреди GET-запроса переводит чтение на основную
+        базу."""
+        read, response = self.handle(self.factory.get('/'), write=True)
+        self.assertEqual(read, 'default')
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+    def test_outside_request_reads_primary(self):
+        """Вне запроса (команды, фоновые потоки) чтение идет в основную
+        базу, миграции на реплики не применяются."""
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+        self.assertFalse(self.router.allow_migrate('replica1', 'posts'))
+        self.assertIsNone(self.router.allow_migrate('default', 'posts'))
@@ -0,0 +1,55 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.backends.cached_db import SessionStore
+from django.contrib.sessions.models import Session
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from . import constants
+
+User = get_user_model()
+
+
+class YatubeSessionTests(TestCase):
+    def test_session_read_from_cache(self):
+        """Запрос вошедшего пользователя не читает django_session."""
+        client = Client()
+        client.force_login(User.objects.create_user(username='reader'))
+        with CaptureQueriesContext(connection) as captured:
+            response = client.get(constants.FOLLOW)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([query for query in captured.captured_queries
+                          if 'django_session' in query['sql']])
+        self.assertEqual(response.context['user'].username, 'reader')
+
+    def test_sessions_cache_isolated(self):
+        """Сессии тестов не попадают в файловый кэш CACHE_DIR."""
+        self.assertIsInstance(
+            caches[settings.SESSION_CACHE_ALIAS],
+            LocMemCache
+        )
+
+    def test_purge_removes_expired_only(self):
+        """purge_sessions удаляет порциями только истекшие сессии."""
+        keys = []
+        for _ in range(5):
+            store = SessionStore()
+            store['value'] = 1
+            store.create()
+            keys.append(store.session_key)
+        Session.objects.filter(session_key__in=keys[:3]).update(
+            expire_date=timezone.now() - timedelta(days=1)
+        )
+        call_command('purge_sessions', '--batch-size=2', stdout=StringIO())
+        self.assertEqual(
+            set(Session.objects.values_list('session_key', flat=True)),
+            set(keys[3:])
+        )
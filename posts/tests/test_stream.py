@@ -0,0 +1,95 @@
+import json
+import threading
+
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+from posts.stream import broker, serialize
+
+from . import constants
+
+STREAM = reverse('stream')
+GROUP_STREAM = reverse('group_stream', kwargs={'slug': constants.slug})
+
+
+@override_settings(STREAM_TIMEOUT=0.05, STREAM_HEARTBEAT=0.01)
+class YatubeStreamTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=constants.username)
+        cls.group = Group.objects.create(
+            title=constants.title,
+            slug=constants.slug,
+            description=constants.description,
+        )
+        cls.guest_client = Client()
+
+    def read(self, url):
+        """Публикует пост в сообществе и пост без сообщества, читает
+        поток с момента до публикации."""
+        last_id = broker.last_id
+        posts = [
+            Post.objects.create(
+                text=constants.text,
+                author=self.user,
+                group=self.group
+            ),
+            Post.objects.create(text=constants.text_other, author=self.user),
+        ]
+        # В TestCase on_commit не вызывается, публикуем напрямую.
+        for post in posts:
+            broker.publish(
+                post.group.slug if post.group else None,
+                serialize(post)
+            )
+        response = self.guest_client.get(url, HTTP_LAST_EVENT_ID=str(last_id))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = b''.join(response.streaming_content).decode()
+        return [json.loads(line[len('data: '):])
+                for line in body.splitlines() if line.startswith('data: ')]
+
+    def test_stream_sends_new_posts(self):
+        """Поток отдает новые посты в JSON."""
+        events = self.read(STREAM)
+        self.assertEqual(
+            [event['text'] for event in events],
+            [constants.text, constants.text_other]
+        )
+        self.assertEqual(events[0]['group'], constants.slug)
+        self.assertEqual(events[0]['author'], constants.username)
+
+    def test_group_stream_filters_posts(self):
+        """Поток сообщества отдает только посты этого сообщества."""
+        events = self.read(GROUP_STREAM)
+        self.assertEqual([event['text'] for event in events],
+                         [constants.text])
+
+    def test_stream_unknown_group(self):
+        """Поток несуществующего сообщества возвращает 404."""
+        response = self.guest_client.get(
+            reverse('group_stream', kwargs={'slug': 'not_found'})
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class YatubeStreamPublishTests(TransactionTestCase):
+    def test_saved_post_reaches_subscriber(self):
+        """Сохраненный пост после фиксации транзакции получает
+        подписчик потока."""
+        user = User.objects.create_user(username=constants.username)
+        last_id = broker.last_id
+        received = []
+        subscriber = threading.Thread(
+            target=lambda: received.extend(broker.wait(last_id, 5))
+        )
+        subscriber.start()
+        post = Post.objects.create(text=constants.text, author=user)
+        subscriber.join()
+        self.assertEqual(len(received), 1)
+        _, group, data = received[0]
+        self.assertIsNone(group)
+        self.assertEqual(json.loads(data)['id'], post.pk)
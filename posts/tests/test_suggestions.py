@@ -0,0 +1,101 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import suggestions
+from posts.models import Follow, Suggestion, User
+
+from . import constants
+
+
+class YatubeSuggestionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.users = {
+            name: User.objects.create_user(username=name)
+            for name in ('reader', 'friend', 'twin', 'far', 'near', 'other')
+        }
+        for user, author in (
+            ('reader', 'friend'),
+            ('friend', 'near'),
+            ('friend', 'other'),
+            ('twin', 'friend'),
+            ('twin', 'far'),
+        ):
+            Follow.objects.create(
+                user=cls.users[user],
+                author=cls.users[author],
+            )
+        cls.reader_client = Client()
+        cls.reader_client.force_login(cls.users['reader'])
+
+    def ranked(self, name):
+        return list(Suggestion.objects.filter(
+            user=self.users[name]
+        ).order_by('rank').values_list('candidate__username', flat=True))
+
+    def test_build_ranks_candidates(self):
+        """Похожие подписчики весят больше, чем подписки друзей, а уже
+        отслеживаемые авторы не рекомендуются."""
+        call_command('build_suggestions', stdout=StringIO())
+        self.assertEqual(self.ranked('reader'), ['far', 'near', 'other'])
+        self.assertEqual(
+            Suggestion.objects.get(
+                user=self.users['reader'],
+                candidate=self.users['near'],
+            ).mutual,
+            1
+        )
+        self.assertNotIn('friend', self.ranked('twin'))
+
+    def test_follow_removes_suggestion(self):
+        """Подписка убирает автора из рекомендаций без пересчета."""
+        suggestions.build()
+        Follow.objects.create(
+            user=self.users['reader'],
+            author=self.users['far'],
+        )
+        self.assertEqual(self.ranked('reader'), ['near', 'other'])
+
+    def test_pages_show_suggestions(self):
+        """Лента подписок и профиль показывают рекомендации, читая их
+        одним запросом."""
+        suggestions.build()
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                len(suggestions.for_user(self.users['reader'])),
+                3
+            )
+        for url in (
+            constants.FOLLOW,
+            reverse('profile', kwargs={'username': 'reader'}),
+        ):
+            with self.subTest(url=url):
+                response = self.reader_client.get(url)
+                self.assertContains(response, '@far')
+                self.assertEqual(len(response.context['suggestions']), 3)
+
+    def test_profile_etag_follows_suggestions(self):
+        """Профиль не отдает 304 со старыми рекомендациями зрителя."""
+        url = reverse('profile', kwargs={'username': 'twin'})
+        etag = self.reader_client.get(url)['ETag']
+        self.assertEqual(
+            self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code,
+            304
+        )
+        for change in (
+            suggestions.build,
+            lambda: Follow.objects.create(
+                user=self.users['reader'],
+                author=self.users['far'],
+            ),
+        ):
+            change()
+            response = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            etag = response['ETag']
+        self.assertNotContains(response, '@far')
+        self.assertContains(response, '@near')
@@ -0,0 +1,123 @@
+import math
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import trending
+from posts.models import Comment, Follow, Group, GroupTrend, Post, PostTrend
+from posts.models import User
+
+from . import constants
+
+
+class YatubeTrendingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=constants.username)
+        cls.author = User.objects.create_user(username=constants.username2)
+        cls.group = Group.objects.create(
+            title=constants.title,
+            slug=constants.slug,
+            description=constants.description,
+        )
+        cls.quiet = Post.objects.create(
+            text=constants.text,
+            author=cls.author,
+            group=cls.group,
+        )
+        cls.busy = Post.objects.create(
+            text=constants.text_other,
+            author=cls.user,
+            group=cls.group,
+        )
+
+    def test_events_update_scores(self):
+        """Комментарии и подписки поднимают пост и его сообщество."""
+        group_score = GroupTrend.objects.get(group=self.group).score
+        Comment.objects.create(post=self.busy, author=self.author, text='1')
+        Follow.objects.create(user=self.author, author=self.user)
+        self.assertEqual(
+            list(trending.top_posts()),
+            [self.busy, self.quiet]
+        )
+        self.assertGreater(
+            GroupTrend.objects.get(group=self.group).score,
+            group_score
+        )
+
+    @override_settings(TRENDING_HALF_LIFE=3600)
+    def test_scores_decay(self):
+        """Вклад события уменьшается вдвое за период полураспада,
+        а старое событие уступает свежему."""
+        now = 1_700_000_000
+        old = trending.log_weight('comment', now - 3600)
+        self.assertAlmostEqual(trending.current(old, now), 1.0)
+        self.assertAlmostEqual(
+            trending.current(trending.add_logs(old, old), now),
+            2.0
+        )
+        self.assertLess(old, trending.log_weight('post', now))
+
+    def test_pages_read_trend_table(self):
+        """Страница популярного и боковая панель сообщества читают
+        таблицу оценок."""
+        Comment.objects.create(post=self.busy, author=self.author, text='1')
+        with self.assertNumQueries(1):
+            self.assertEqual(len(trending.top_posts(self.group, 5)), 2)
+        response = Client().get(reverse('trending'))
+        self.assertEqual(list(response.context['posts'])[0], self.busy)
+        self.assertEqual(list(response.context['groups']), [self.group])
+        response = Client().get(constants.group_page)
+        self.assertEqual(len(response.context['trending']), 2)
+
+    def test_follow_updates_cached_pages(self):
+        """Подписка сбрасывает кэш страницы популярного и сообщества."""
+        client = Client()
+        pages = {
+            reverse('trending'): 'posts',
+            constants.group_page: 'trending',
+        }
+        for page, key in pages.items():
+            response = client.get(page)
+            self.assertEqual(response.context[key][0], self.busy)
+            self.assertIsNone(client.get(page).context)
+        Follow.objects.create(user=self.user, author=self.author)
+        for page, key in pages.items():
+            with self.subTest(page=page):
+                response = client.get(page)
+                self.assertIsNotNone(response.context)
+                self.assertEqual(response.context[key][0], self.quiet)
+
+    def test_group_change_moves_post(self):
+        """Перенос поста в другое сообщество переносит его оценку
+        вместе с вкладом в оценку сообщества."""
+        other = Group.objects.create(
+            title=constants.title_other,
+            slug=constants.slug_other,
+            description=constants.description_other,
+        )
+        scores = dict(PostTrend.objects.values_list('post', 'score'))
+        self.quiet.group = other
+        self.quiet.save()
+        self.assertEqual(PostTrend.objects.get(post=self.quiet).group, other)
+        self.assertEqual(list(trending.top_posts(self.group)), [self.busy])
+        groups = dict(GroupTrend.objects.values_list('group', 'score'))
+        self.assertAlmostEqual(groups[self.group.pk], scores[self.busy.pk])
+        self.assertAlmostEqual(groups[other.pk], scores[self.quiet.pk])
+        self.busy.group = None
+        self.busy.save()
+        self.assertFalse(GroupTrend.objects.filter(group=self.group).exists())
+        self.assertIsNone(PostTrend.objects.get(post=self.busy).group)
+
+    def test_rebuild_matches_events(self):
+        """Пересчет по таблицам дает те же оценки постов."""
+        Comment.objects.create(post=self.busy, author=self.author, text='1')
+        before = dict(PostTrend.objects.values_list('post', 'score'))
+        call_command('rebuild_trending', stdout=StringIO())
+        after = dict(PostTrend.objects.values_list('post', 'score'))
+        self.assertEqual(before.keys(), after.keys())
+        for pk, score in before.items():
+            self.assertTrue(math.isclose(score, after[pk], rel_tol=1e-6))
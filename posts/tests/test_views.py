@@ -4,10 +4,12 @@ from django.core.cache import cache
 from django import forms
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from posts.models import Group, Post, User
+from posts.models import Follow, Group, Post, User
 
 from . import constants
 
@@ -185,14 +187,16 @@ class YatubePagesTests(TestCase):
 
     def test_cache_index_page(self):
         """Кэш страницы index работает корректно"""
-        response = self.authorized_client.get(constants.HOME_PAGE)
-        context = response.content
-        Post.objects.create(
-            text=constants.text_other,
+        post = Post.objects.create(
+            text=constants.text,
             author=self.user,
             group=self.group,
         )
         response = self.authorized_client.get(constants.HOME_PAGE)
+        context = response.content
+        # update не отправляет сигналы и не меняет версию кэша.
+        Post.objects.filter(pk=post.pk).update(text=constants.text_edit)
+        response = self.authorized_client.get(constants.HOME_PAGE)
         context_add = response.content
         cache.clear()
         response = self.authorized_client.get(constants.HOME_PAGE)
@@ -200,6 +204,22 @@ class YatubePagesTests(TestCase):
         self.assertEqual(context, context_add)
         self.assertNotEqual(context, context_clean)
 
+    def test_cache_index_page_new_post(self):
+        """Новый пост сразу виден на главной и анонимному, и вошедшему
+        пользователю."""
+        guest_client = Client()
+        self.authorized_client.get(constants.HOME_PAGE)
+        guest_client.get(constants.HOME_PAGE)
+        Post.objects.create(
+            text=constants.text_other,
+            author=self.user,
+            group=self.group,
+        )
+        for client in (guest_client, self.authorized_client):
+            with self.subTest(client=client):
+                response = client.get(constants.HOME_PAGE)
+                self.assertContains(response, constants.text_other)
+
     def test_follow_unfollow(self):
         """
         Авторизированный пользователь может
@@ -240,3 +260,467 @@ class YatubePagesTests(TestCase):
         context_not_add = response.context['page'].end_index()
         self.assertEqual(context + 1, context_add)
         self.assertEqual(context, context_not_add)
+
+
+class YatubeFeedQueriesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=constants.username)
+        cls.group = Group.objects.create(
+            title=constants.title,
+            slug=constants.slug,
+            description=constants.description,
+        )
+        cls.guest_client = Client()
+
+    def create_posts(self, count):
+        for i in range(count):
+            author = User.objects.create_user(username=f'author_{i}')
+            post = Post.objects.create(
+                text=constants.text,
+                author=author,
+                group=self.group,
+            )
+            post.comments.create(author=self.user, text=constants.text_comment)
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_feed_queries_do_not_depend_on_posts(self):
+        """Число запросов ленты не зависит от числа постов на странице."""
+        urls = (
+            constants.HOME_PAGE,
+            constants.group_page,
+            constants.profile_page,
+        )
+        Post.objects.create(text=constants.text, author=self.user)
+        single = {url: self.count_queries(url) for url in urls}
+        self.create_posts(settings.PAGINATOR_PAGE)
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.count_queries(url), single[url])
+
+    def test_feed_shows_comment_count(self):
+        """Лента выводит число комментариев поста."""
+        self.create_posts(1)
+        response = self.guest_client.get(constants.group_page)
+        self.assertEqual(response.context['page'][0].comment_count, 1)
+        self.assertContains(response, 'Комментариев: 1')
+
+
+class YatubeNavCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=constants.username)
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_nav_is_cached_and_invalidated(self):
+        """Меню берется из кэша и обновляется при новом сообществе."""
+        self.authorized_client.get(constants.ABOUT_AUTHOR_PAGE)
+        with CaptureQueriesContext(connection) as queries:
+            self.authorized_client.get(constants.ABOUT_AUTHOR_PAGE)
+        self.assertFalse(any(
+            'posts_group' in query['sql']
+            for query in queries.captured_queries
+        ))
+        Group.objects.create(
+            title=constants.title,
+            slug=constants.slug,
+            description=constants.description,
+        )
+        response = self.authorized_client.get(constants.ABOUT_AUTHOR_PAGE)
+        self.assertContains(response, f'/group/{constants.slug}/')
+
+    @override_settings(NAV_USERS_LIMIT=1)
+    def test_nav_follows_post_counts(self):
+        """Порядок авторов в меню обновляется при новом и удаленном
+        посте."""
+        writer = User.objects.create_user(username=f'{constants.username}_z')
+
+        def first_user():
+            response = self.authorized_client.get(constants.ABOUT_AUTHOR_PAGE)
+            return response.context['user_button'][0]['username']
+
+        self.assertEqual(first_user(), constants.username)
+        post = Post.objects.create(text=constants.text, author=writer)
+        self.assertEqual(first_user(), writer.username)
+        post.delete()
+        self.assertEqual(first_user(), constants.username)
+
+    def test_nav_is_limited(self):
+        """Меню выводит не больше NAV_USERS_LIMIT пользователей."""
+        User.objects.bulk_create([
+            User(username=f'user_{i}')
+            for i in range(settings.NAV_USERS_LIMIT + 5)
+        ])
+        response = self.authorized_client.get(constants.ABOUT_AUTHOR_PAGE)
+        self.assertEqual(
+            len(response.context['user_button']),
+            settings.NAV_USERS_LIMIT
+        )
+
+
+class YatubePageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=constants.username)
+        cls.group = Group.objects.create(
+            title=constants.title,
+            slug=constants.slug,
+            description=constants.description,
+        )
+        cls.group_other = Group.objects.create(
+            title=constants.title_other,
+            slug=constants.slug_other,
+            description=constants.description_other,
+        )
+        cls.group_other_page = reverse(
+            'group',
+            kwargs={'slug': constants.slug_other}
+        )
+        cls.guest_client = Client()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_anonymous_page_served_without_queries(self):
+        """Повторный анонимный запрос не обращается к базе."""
+        urls = (
+            constants.HOME_PAGE,
+            constants.group_page,
+            constants.profile_page,
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                first = self.guest_client.get(url)
+                with self.assertNumQueries(0):
+                    second = self.guest_client.get(url)
+                self.assertEqual(first.content, second.content)
+
+    def test_new_post_bumps_only_its_scopes(self):
+        """Новый пост сбрасывает свои страницы и не трогает чужие."""
+        self.guest_client.get(constants.group_page)
+        self.guest_client.get(self.group_other_page)
+        Post.objects.create(
+            text=constants.text_other,
+            author=self.user,
+            group=self.group,
+        )
+        response = self.guest_client.get(constants.group_page)
+        self.assertContains(response, constants.text_other)
+        with self.assertNumQueries(0):
+            self.guest_client.get(self.group_other_page)
+
+    def test_authorized_user_not_cached(self):
+        """Авторизованный пользователь получает свежую страницу."""
+        client = Client()
+        client.force_login(self.user)
+        client.get(constants.profile_page)
+        response = client.get(constants.profile_page)
+        self.assertIsNotNone(response.context)
+
+
+class YatubeSearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username=constants.username,
+            is_staff=True,
+            is_superuser=True,
+        )
+        cls.guest_client = Client()
+        cls.search_page = reverse('search')
+
+    def found(self, query):
+        response = self.guest_client.get(self.search_page, {'q': query})
+        return response.context['page'].paginator.count
+
+    def test_search_ranks_and_paginates(self):
+        """Поиск находит посты по словам и сортирует по релевантности."""
+        Post.objects.create(text='Кот спит', author=self.user)
+        best = Post.objects.create(text='Кот кот кот', author=self.user)
+        Post.objects.create(text='Собака', author=self.user)
+        response = self.guest_client.get(self.search_page, {'q': 'кот'})
+        page = response.context['page']
+        self.assertEqual(page.paginator.count, 2)
+        self.assertEqual(page[0], best)
+
+    def test_search_follows_edits(self):
+        """Индекс обновляется при изменении и удалении поста."""
+        post = Post.objects.create(text='Старый текст', author=self.user)
+        post.text = 'Новый текст'
+        post.save()
+        self.assertEqual(self.found('старый'), 0)
+        self.assertEqual(self.found('новый'), 1)
+        post.delete()
+        self.assertEqual(self.found('новый'), 0)
+
+    def test_search_accepts_any_input(self):
+        """Кавычки и операторы во вводе не ломают запрос."""
+        for query in ('"', 'AND OR', 'кот*(', ''):
+            with self.subTest(query=query):
+                response = self.guest_client.get(
+                    self.search_page,
+                    {'q': query}
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке находит посты через индекс."""
+        Post.objects.create(text='Иголка в стоге', author=self.user)
+        Post.objects.create(text='Стог сена', author=self.user)
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(
+            reverse('admin:posts_post_changelist'),
+            {'q': 'иголка'}
+        )
+        self.assertEqual(response.context['cl'].result_count, 1)
+
+
+class YatubeConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=constants.username)
+        cls.other = User.objects.create_user(username=constants.username2)
+        cls.group = Group.objects.create(
+            title=constants.title,
+            slug=constants.slug,
+            description=constants.description,
+        )
+        cls.post = Post.objects.create(
+            text=constants.text,
+            author=cls.user,
+            group=cls.group,
+        )
+        cls.post_page = reverse('post', kwargs={
+            'username': constants.username,
+            'post_id': cls.post.id,
+        })
+        cls.guest_client = Client()
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+        cls.other_client = Client()
+        cls.other_client.force_login(cls.other)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_unchanged_page_not_modified(self):
+        """Неизменившаяся страница возвращает 304 без отрисовки."""
+        urls = (
+            constants.HOME_PAGE,
+            constants.group_page,
+            constants.profile_page,
+            self.post_page,
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                with self.assertNumQueries(0):
+                    response = self.guest_client.get(
+                        url,
+                        HTTP_IF_NONE_MATCH=etag
+                    )
+                self.assertEqual(response.status_code, 304)
+                self.assertIsNone(response.context)
+
+    def test_new_post_changes_validators(self):
+        """Новый пост меняет ETag страниц своих областей, а проверка
+        только по дате не дает 304."""
+        first = self.guest_client.get(constants.group_page)
+        self.assertFalse(first.has_header('Last-Modified'))
+        Post.objects.create(
+            text=constants.text_other,
+            author=self.user,
+            group=self.group,
+        )
+        response = self.guest_client.get(
+            constants.group_page,
+            HTTP_IF_NONE_MATCH=first['ETag']
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, constants.text_other)
+        response = self.authorized_client.get(
+            constants.group_page,
+            HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT'
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_depends_on_viewer_and_cursor(self):
+        """ETag зависит от пользователя и курсора страницы."""
+        etag = self.authorized_client.get(constants.HOME_PAGE)['ETag']
+        response = self.authorized_client.get(
+            constants.HOME_PAGE,
+            HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 304)
+        for client, data in (
+            (self.other_client, {}),
+            (self.guest_client, {}),
+            (self.authorized_client, {'after': 'cursor'}),
+        ):
+            with self.subTest(data=data):
+                response = client.get(
+                    constants.HOME_PAGE,
+                    data,
+                    HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 200)
+
+
+class YatubeCommentPagesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=constants.username)
+        cls.post = Post.objects.create(text=constants.text, author=cls.user)
+        cls.post_page = reverse('post', kwargs={
+            'username': constants.username,
+            'post_id': cls.post.id,
+        })
+        cls.comments_page = reverse('post_comments', kwargs={
+            'username': constants.username,
+            'post_id': cls.post.id,
+        })
+        cls.guest_client = Client()
+
+    def setUp(self):
+        cache.clear()
+
+    def add_comments(self, count):
+        start = User.objects.count()
+        for i in range(start, start + count):
+            author = User.objects.create_user(username=f'reader_{i}')
+            self.post.comments.create(
+                author=author,
+                text=f'{constants.text_comment} {i}'
+            )
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.guest_client.get(url)
+        return len(queries)
+
+    def test_comments_context_not_evaluated(self):
+        """comments в контексте — queryset страницы, он не выполняется
+        отдельно."""
+        self.add_comments(1)
+        response = self.guest_client.get(self.post_page)
+        comments = response.context['comments']
+        self.assertIs(comments, response.context['comment_page'].paginator
+                      .object_list)
+        self.assertIsNone(comments._result_cache)
+
+    def test_post_page_queries_bounded(self):
+        """Число запросов страницы поста не зависит от числа
+        комментариев."""
+        self.add_comments(1)
+        single = self.count_queries(self.post_page)
+        self.add_comments(settings.COMMENTS_PAGE * 2)
+        self.assertEqual(self.count_queries(self.post_page), single)
+
+    def test_comments_loaded_by_pages(self):
+        """Страница поста выводит первую страницу комментариев,
+        остальные подгружаются фрагментами."""
+        self.add_comments(settings.COMMENTS_PAGE * 2 + 1)
+        response = self.guest_client.get(self.post_page)
+        page = response.context['comment_page']
+        self.assertEqual(len(page), settings.COMMENTS_PAGE)
+        seen = [comment.id for comment in page]
+        while page.has_next():
+            response = self.guest_client.get(
+                self.comments_page,
+                {'after': page.paginator.next_cursor}
+            )
+            self.assertTemplateUsed(response, 'include/comment_list.html')
+            self.assertNotContains(response, '<html')
+            page = response.context['comment_page']
+            seen += [comment.id for comment in page]
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(len(seen), self.post.comments.count())
+
+    def test_comments_of_other_author_hidden(self):
+        """Фрагмент не отдает комментарии к посту другого автора."""
+        self.add_comments(1)
+        response = self.guest_client.get(reverse('post_comments', kwargs={
+            'username': self.post.comments.get().author.username,
+            'post_id': self.post.id,
+        }))
+        self.assertEqual(len(response.context['comment_page']), 0)
+
+
+class YatubePostDetailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=constants.username)
+        cls.other = User.objects.create_user(username=constants.username2)
+        cls.group = Group.objects.create(
+            title=constants.title,
+            slug=constants.slug,
+            description=constants.description,
+        )
+        cls.post = Post.objects.create(
+            text=constants.text,
+            author=cls.user,
+            group=cls.group,
+        )
+        cls.post_page = reverse('post', kwargs={
+            'username': constants.username,
+            'post_id': cls.post.id,
+        })
+        cls.guest_client = Client()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_post_of_other_author_not_found(self):
+        """Пост по адресу другого автора возвращает 404."""
+        response = self.guest_client.get(reverse('post', kwargs={
+            'username': constants.username2,
+            'post_id': self.post.id,
+        }))
+        self.assertEqual(response.status_code, 404)
+
+    def test_post_detail_served_from_cache(self):
+        """Повторный просмотр поста загружает из базы только
+        комментарии."""
+        self.guest_client.get(self.post_page)
+        with self.assertNumQueries(1):
+            response = self.guest_client.get(self.post_page)
+        self.assertEqual(response.context['post'], self.post)
+        self.assertEqual(response.context['post'].group, self.group)
+        self.assertEqual(response.context['all_post'], 1)
+
+    def test_post_detail_cache_invalidated(self):
+        """Правка поста, комментарий и подписка обновляют страницу
+        поста."""
+        self.guest_client.get(self.post_page)
+        self.post.text = constants.text_edit
+        self.post.save()
+        response = self.guest_client.get(self.post_page)
+        self.assertContains(response, constants.text_edit)
+        self.post.comments.create(
+            author=self.other,
+            text=constants.text_comment
+        )
+        response = self.guest_client.get(self.post_page)
+        self.assertEqual(response.context['post'].comment_count, 1)
+        Follow.objects.create(user=self.other, author=self.user)
+        response = self.guest_client.get(self.post_page)
+        self.assertEqual(response.context['stats'].followers_count, 1)
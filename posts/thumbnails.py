@@ -0,0 +1,59 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+from sorl.thumbnail import get_thumbnail
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(
+    max_workers=1,
+    thread_name_prefix='thumbnails'
+)
+
+
+def warm(name):
+    """Создает все миниатюры изображения из POST_THUMBNAILS
+
+        Ключевые аргументы:
+        name -- имя файла изображения в хранилище
+        """
+    for geometry, options in settings.POST_THUMBNAILS.items():
+        get_thumbnail(name, geometry, **options)
+
+
+def _warm_safely(name):
+    # Пост уже сохранен, ошибка миниатюр не должна превращаться в 500.
+    try:
+        warm(name)
+    except Exception:
+        logger.exception('Не удалось создать миниатюры для %s', name)
+
+
+def _warm_in_background(name):
+    try:
+        _warm_safely(name)
+    finally:
+        connection.close()
+
+
+def _in_memory_db():
+    return (connection.vendor == 'sqlite'
+            and connection.is_in_memory_db())
+
+
+def schedule(name):
+    """Создает миниатюры после фиксации транзакции, не задерживая ответ
+
+        Ключевые аргументы:
+        name -- имя файла изображения в хранилище
+        """
+    # Общая in-memory база SQLite блокирует таблицы целиком и не ждет
+    # освобождения, поэтому фоновый поток с ней не используется.
+    if settings.THUMBNAIL_WARM_ASYNC and not _in_memory_db():
+        transaction.on_commit(
+            lambda: _executor.submit(_warm_in_background, name)
+        )
+    else:
+        transaction.on_commit(lambda: _warm_safely(name))
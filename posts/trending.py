@@ -0,0 +1,258 @@
+import math
+import time
+from datetime import datetime, timedelta, timezone
+from itertools import chain
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.timezone import now
+
+from .models import Comment, Group, GroupTrend, Post, PostTrend
+
+BATCH_SIZE = 500
+# Остаток меньше этой доли оценки считается ошибкой округления.
+LOG_PRECISION = 1e-9
+
+# Точка отсчета времени для оценок, менять нельзя без пересчета.
+EPOCH = datetime(2021, 1, 1, tzinfo=timezone.utc).timestamp()
+
+
+def _rate():
+    return math.log(2) / settings.TRENDING_HALF_LIFE
+
+
+def log_weight(event, when=None):
+    """Возвращает логарифм вклада события, приведенного к EPOCH
+
+        Вклад w в момент t хранится как w * exp(rate * (t - EPOCH)).
+        Отношение таких вкладов не меняется со временем, поэтому
+        сортировка по сохраненной оценке совпадает с сортировкой
+        по затухшей на текущий момент, и строки не нужно пересчитывать.
+        Логарифм не дает числу переполниться через несколько лет.
+
+        Ключевые аргументы:
+        event -- вид события из TRENDING_WEIGHTS
+        when -- время события в секундах, по умолчанию сейчас
+        """
+    if when is None:
+        when = time.time()
+    return (math.log(settings.TRENDING_WEIGHTS[event])
+            + _rate() * (when - EPOCH))
+
+
+def add_logs(first, second):
+    high, low = max(first, second), min(first, second)
+    return high + math.log1p(math.exp(low - high))
+
+
+def current(score, moment=None):
+    """Возвращает затухшую на текущий момент оценку
+
+        Ключевые аргументы:
+        score -- сохраненный логарифм оценки
+        moment -- момент времени в секундах, по умолчанию сейчас
+        """
+    if moment is None:
+        moment = time.time()
+    return math.exp(score - _rate() * (moment - EPOCH))
+
+
+def _add(model, key, value, **defaults):
+    trend = model.objects.select_for_update().filter(**key).first()
+    if trend is None:
+        model.objects.create(score=value, **key, **defaults)
+        return
+    trend.score = add_logs(trend.score, value)
+    for field, field_value in defaults.items():
+        setattr(trend, field, field_value)
+    trend.save()
+
+
+@transaction.atomic
+def record(event, post_id=None, group_id=None, when=None):
+    """Добавляет событие к оценкам поста и его сообщества
+
+        Меняются только две строки, таблицы постов и комментариев
+        не перечитываются.
+
+        Ключевые аргументы:
+        event -- вид события из TRENDING_WEIGHTS
+        post_id -- id поста
+        group_id -- id сообщества поста
+        when -- время события в секундах, по умолчанию сейчас
+        """
+    value = log_weight(event, when)
+    if post_id is not None:
+        _add(PostTrend, {'post_id': post_id}, value, group_id=group_id)
+    if group_id is not None:
+        _add(GroupTrend, {'group_id': group_id}, value)
+
+
+def subtract_logs(total, part):
+    """Возвращает логарифм разности оценок или None, если не осталось
+    ничего
+
+        Ключевые аргументы:
+        total -- логарифм общей оценки
+        part -- логарифм вычитаемой части
+        """
+    if part >= total - LOG_PRECISION:
+        return None
+    return total + math.log1p(-math.exp(part - total))
+
+
+@transaction.atomic
+def move_post(post_id, group_id):
+    """Переносит оценку поста из старого сообщества в новое
+
+        Вклад поста вычитается из оценки старого сообщества целиком,
+        поэтому для поста, попавшего туда не сразу, оценка сообщества
+        станет немного ниже точной. rebuild_trending считает ее заново.
+
+        Ключевые аргументы:
+        post_id -- id поста
+        group_id -- id нового сообщества или None
+        """
+    trend = PostTrend.objects.select_for_update().filter(
+        post_id=post_id
+    ).first()
+    if trend is None or trend.group_id == group_id:
+        return
+    if trend.group_id is not None:
+        old = GroupTrend.objects.select_for_update().filter(
+            group_id=trend.group_id
+        ).first()
+        if old is not None:
+            score = subtract_logs(old.score, trend.score)
+            if score is None:
+                old.delete()
+            else:
+                old.score = score
+                old.save()
+    if group_id is not None:
+        _add(GroupTrend, {'group_id': group_id}, trend.score)
+    trend.group_id = group_id
+    trend.save()
+
+
+def _accumulate(scores, key, value):
+    if key is not None:
+        old = scores.get(key)
+        scores[key] = value if old is None else add_logs(old, value)
+
+
+def _since(half_lives):
+    return now() - timedelta(
+        seconds=settings.TRENDING_HALF_LIFE * half_lives
+    )
+
+
+def _scores(events):
+    posts, groups, post_groups = {}, {}, {}
+    for event, post_id, group_id, when in events:
+        value = log_weight(event, when.timestamp())
+        _accumulate(posts, post_id, value)
+        _accumulate(groups, group_id, value)
+        post_groups[post_id] = group_id
+    return posts, groups, post_groups
+
+
+def _merge(model, scores, **fields):
+    trends = model.objects.select_for_update().in_bulk(list(scores))
+    for pk, trend in trends.items():
+        trend.score = add_logs(trend.score, scores[pk])
+    model.objects.bulk_update(
+        trends.values(),
+        ['score'],
+        batch_size=BATCH_SIZE,
+    )
+    model.objects.bulk_create(
+        (model(pk=pk, score=score, **{
+            field: values[pk] for field, values in fields.items()
+        }) for pk, score in scores.items() if pk not in trends),
+        batch_size=BATCH_SIZE,
+    )
+
+
+@transaction.atomic
+def add_events(events, half_lives=10):
+    """Добавляет пачку событий к оценкам, например при импорте
+
+        В отличие от rebuild меняются только строки затронутых постов
+        и сообществ, остальные оценки, в том числе от подписок,
+        сохраняются. Возвращает число постов и сообществ, оценки
+        которых изменились.
+
+        Ключевые аргументы:
+        events -- кортежи (вид события, id поста, id сообщества, время)
+        half_lives -- за сколько периодов полураспада учитывать события
+        """
+    since = _since(half_lives)
+    posts, groups, post_groups = _scores(
+        row for row in events if row[3] >= since
+    )
+    _merge(PostTrend, posts, group_id=post_groups)
+    _merge(GroupTrend, groups)
+    return len(posts), len(groups)
+
+
+@transaction.atomic
+def rebuild(half_lives=10):
+    """Заново считает оценки по постам и комментариям
+
+        Возвращает число постов и сообществ с оценкой. Подписки
+        не хранят время и в пересчет не попадают.
+
+        Ключевые аргументы:
+        half_lives -- за сколько периодов полураспада учитывать события
+        """
+    since = _since(half_lives)
+    posts, groups, post_groups = _scores(chain(
+        (('post', *row) for row in Post.objects.filter(
+            pub_date__gte=since
+        ).values_list('pk', 'group_id', 'pub_date').iterator()),
+        (('comment', *row) for row in Comment.objects.filter(
+            created__gte=since
+        ).values_list('post_id', 'post__group_id', 'created').iterator()),
+    ))
+    PostTrend.objects.all().delete()
+    GroupTrend.objects.all().delete()
+    PostTrend.objects.bulk_create(
+        (PostTrend(post_id=pk, group_id=post_groups[pk], score=score)
+         for pk, score in posts.items()),
+        batch_size=BATCH_SIZE,
+    )
+    GroupTrend.objects.bulk_create(
+        (GroupTrend(group_id=pk, score=score)
+         for pk, score in groups.items()),
+        batch_size=BATCH_SIZE,
+    )
+    return len(posts), len(groups)
+
+
+def top_posts(group=None, limit=None):
+    """Возвращает популярные посты одним запросом по индексу оценки
+
+        Ключевые аргументы:
+        group -- сообщество, по умолчанию все посты
+        limit -- сколько постов вернуть
+        """
+    if limit is None:
+        limit = settings.TRENDING_LIMIT
+    posts = Post.objects.for_feed().filter(trend__isnull=False)
+    if group is not None:
+        posts = posts.filter(trend__group=group)
+    return posts.order_by('-trend__score')[:limit]
+
+
+def top_groups(limit=None):
+    """Возвращает популярные сообщества одним запросом
+
+        Ключевые аргументы:
+        limit -- сколько сообществ вернуть
+        """
+    if limit is None:
+        limit = settings.TRENDING_SIDEBAR
+    return Group.objects.filter(
+        trend__isnull=False
+    ).order_by('-trend__score')[:limit]
@@ -1,5 +1,3 @@
-from django.conf import settings
-from django.conf.urls.static import static
 from django.urls import path
 
 from . import views
@@ -7,7 +5,15 @@ from . import views
 urlpatterns = [
     path('', views.index, name='index'),
     path('group/<slug:slug>/', views.group_posts, name='group'),
+    path(
+        'group/<slug:slug>/stream/',
+        views.group_stream,
+        name='group_stream'
+    ),
     path('new/', views.new_post, name='new_post'),
+    path('search/', views.search, name='search'),
+    path('stream/', views.stream, name='stream'),
+    path('trending/', views.trending, name='trending'),
     path(
         'follow/',
         views.follow_index,
@@ -20,6 +26,11 @@ urlpatterns = [
         views.post_edit,
         name='post_edit'
     ),
+    path(
+        '<str:username>/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'
+    ),
     path(
         '<username>/<int:post_id>/comment/',
         views.add_comment,
@@ -36,13 +47,3 @@ urlpatterns = [
         name='profile_unfollow'
     ),
 ]
-
-if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL,
-        document_root=settings.MEDIA_ROOT
-    )
-    urlpatterns += static(
-        settings.STATIC_URL,
-        document_root=settings.STATIC_ROOT
-    )
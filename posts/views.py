@@ -2,30 +2,46 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import F
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.views.decorators.http import require_GET
 
+from .counters import get_stats
 from .forms import CommentForm, PostForm
-from .models import Group, Post, Follow
+from .models import Comment, Group, Post, Follow
+from .page_cache import (GLOBAL_SCOPE, cache_anonymous_page,
+                         conditional_page, get_post, get_version)
+from .paginator import get_page
+from .search import PostSearchResults
+from .stream import events
+from .suggestions import for_user as get_suggestions
+from .trending import top_groups, top_posts
+from .thumbnails import schedule as schedule_thumbnails
 
 
+@conditional_page('global')
+@cache_anonymous_page('global')
 def index(request):
     """Возвращает главную страницу
 
         Ключевые аргументы:
         index.html -- имя HTML-шаблона главной страницы
         Post.object -- словарь с постами
+        page_version -- версия кэша главной, сбрасывает кэш фрагмента
         """
-    post_list = Post.objects.all()
-    paginator = Paginator(post_list, settings.PAGINATOR_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    post_list = Post.objects.for_feed()
+    page = get_page(request, post_list)
     return render(
         request,
         'index.html',
-        {'page': page, }
+        {'page': page, 'page_version': get_version(GLOBAL_SCOPE), }
     )
 
 
+@conditional_page('group', 'slug')
+@cache_anonymous_page('group', 'slug')
 def group_posts(request, slug):
     """Возвращает страницу сообщества
 
@@ -36,14 +52,85 @@ def group_posts(request, slug):
         slug -- адрес страницы сообщества
         """
     group = get_object_or_404(Group, slug=slug)
-    post_list = Post.objects.filter(group=group).all()
-    paginator = Paginator(post_list, settings.PAGINATOR_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    post_list = Post.objects.for_feed().filter(group=group)
+    page = get_page(request, post_list)
     return render(
         request,
         'group.html',
-        {'page': page, 'group': group, },
+        {
+            'page': page,
+            'group': group,
+            'trending': top_posts(group, settings.TRENDING_SIDEBAR),
+        },
+    )
+
+
+@conditional_page('global')
+@cache_anonymous_page('global')
+def trending(request):
+    """Возвращает популярные посты и сообщества
+
+        Ключевые аргументы:
+        trending.html -- имя HTML-шаблона страницы
+        posts -- посты по убыванию затухающей оценки
+        groups -- сообщества по убыванию затухающей оценки
+        """
+    return render(
+        request,
+        'trending.html',
+        {'posts': top_posts(), 'groups': top_groups(), },
+    )
+
+
+def _stream_response(request, group=None):
+    last_id = request.META.get('HTTP_LAST_EVENT_ID', '')
+    response = StreamingHttpResponse(
+        events(group, int(last_id) if last_id.isdigit() else None),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Не даем nginx буферизовать поток.
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@require_GET
+def stream(request):
+    """Возвращает поток Server-Sent Events с новыми постами
+
+        Ключевые аргументы:
+        Last-Event-ID -- заголовок с id последнего полученного события
+        """
+    return _stream_response(request)
+
+
+@require_GET
+def group_stream(request, slug):
+    """Возвращает поток Server-Sent Events с новыми постами сообщества
+
+        Ключевые аргументы:
+        slug -- адрес страницы сообщества
+        Last-Event-ID -- заголовок с id последнего полученного события
+        """
+    group = get_object_or_404(Group, slug=slug)
+    return _stream_response(request, group.slug)
+
+
+def search(request):
+    """Возвращает найденные по тексту посты
+
+        Ключевые аргументы:
+        search.html -- имя HTML-шаблона страницы поиска
+        q -- строка поиска
+        page -- номер страницы результатов
+        """
+    query = request.GET.get('q', '').strip()
+    paginator = Paginator(PostSearchResults(query), settings.PAGINATOR_PAGE)
+    page = paginator.get_page(request.GET.get('page'))
+    return render(
+        request,
+        'search.html',
+        {'page': page, 'query': query, },
     )
 
 
@@ -56,21 +143,28 @@ def new_post(request):
         """
     form = PostForm(request.POST or None, request.FILES or None)
     if form.is_valid():
-        post = form.save(commit=False)
-        post.author = request.user
-        post.save()
+        # Транзакция с BEGIN IMMEDIATE берет блокировку записи, поэтому
+        # открывается только для сохранения.
+        with transaction.atomic():
+            post = form.save(commit=False)
+            post.author = request.user
+            post.save()
+            if post.image:
+                schedule_thumbnails(post.image.name)
         return redirect('index')
     return render(request, 'new.html', {'form': form})
 
 
+@conditional_page('author', 'username', per_viewer=True)
+@cache_anonymous_page('author', 'username')
 def profile(request, username):
     User = get_user_model()
-    author = User.objects.get(username__iexact=username)
-    post_list = Post.objects.filter(author=author).all()
-    paginator = Paginator(post_list, settings.PAGINATOR_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    all_post = page.paginator.count
+    author = User.objects.select_related('stats').get(
+        username__iexact=username
+    )
+    post_list = Post.objects.for_feed().filter(author=author)
+    page = get_page(request, post_list)
+    stats = get_stats(author)
     if request.user.username != username and request.user.is_authenticated:
         is_author = 'False'
         following = Follow.objects.filter(
@@ -83,23 +177,60 @@ def profile(request, username):
     return render(request, 'profile/profile.html', {
         'author': author,
         'page': page,
-        'all_post': all_post,
+        'stats': stats,
+        'all_post': stats.posts_count,
         'following': following,
         'is_author': is_author,
+        'suggestions': get_suggestions(request.user),
     })
 
 
+@conditional_page('author', 'username')
 def post_view(request, username, post_id):
-    User = get_user_model()
-    author = User.objects.get(username__iexact=username)
-    post = Post.objects.get(id=post_id)
-    all_post = Post.objects.filter(author=author).all().count
+    post = get_post(username, post_id)
+    author = post.author
+    stats = get_stats(author)
     form = CommentForm()
+    comment_page = get_page(
+        request,
+        post.comments.select_related('author'),
+        keys=('created', 'pk'),
+        per_page=settings.COMMENTS_PAGE,
+    )
     return render(request, 'profile/post.html', {
         'post': post,
         'author': author,
-        'all_post': all_post,
+        'stats': stats,
+        'all_post': stats.posts_count,
         'form': form,
+        # Тот же queryset, из которого вырезана страница, без запросов.
+        'comments': comment_page.paginator.object_list,
+        'comment_page': comment_page,
+    })
+
+
+@require_GET
+@conditional_page('author', 'username')
+def post_comments(request, username, post_id):
+    """Возвращает HTML-фрагмент со следующей страницей комментариев
+
+        Ключевые аргументы:
+        include/comment_list.html -- имя HTML-шаблона фрагмента
+        after -- курсор последнего показанного комментария
+        """
+    comments = Comment.objects.filter(
+        post_id=post_id,
+        post__author__username__iexact=username,
+    ).select_related('author')
+    return render(request, 'include/comment_list.html', {
+        'comment_page': get_page(
+            request,
+            comments,
+            keys=('created', 'pk'),
+            per_page=settings.COMMENTS_PAGE,
+        ),
+        'username': username,
+        'post_id': post_id,
     })
 
 
@@ -122,6 +253,8 @@ def post_edit(request, username, post_id):
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        if post.image and 'image' in form.changed_data:
+            schedule_thumbnails(post.image.name)
         return redirect('post', username, post_id)
     return render(request, 'new.html', {
         'form': form,
@@ -157,17 +290,21 @@ def add_comment(request, username, post_id):
 
 @login_required
 def follow_index(request):
-    author_list = set()
-    for e in Follow.objects.filter(user=request.user).select_related('author'):
-        author_list.add(e.author)
-    post_list = Post.objects.filter(author__in=[i for i in author_list]).all()
-    paginator = Paginator(post_list, settings.PAGINATOR_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    return render(request, "follow.html", {'page': page, })
+    post_list = Post.objects.for_feed().filter(
+        feed_items__user=request.user
+    ).annotate(
+        feed_date=F('feed_items__pub_date'),
+        feed_post=F('feed_items__post'),
+    )
+    page = get_page(request, post_list, keys=('feed_date', 'feed_post'))
+    return render(request, "follow.html", {
+        'page': page,
+        'suggestions': get_suggestions(request.user),
+    })
 
 
 @login_required
+@transaction.atomic
 def profile_follow(request, username):
     User = get_user_model()
     author = User.objects.get(username__iexact=username)
@@ -180,6 +317,7 @@ def profile_follow(request, username):
 
 
 @login_required
+@transaction.atomic
 def profile_unfollow(request, username):
     User = get_user_model()
     author = User.objects.get(username__iexact=username)
@@ -1,9 +1,16 @@
 import datetime as dt
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Count
+from django.utils.functional import SimpleLazyObject
 
 from posts.models import Group
 
+NAV_GROUPS_KEY = 'nav:groups'
+NAV_USERS_KEY = 'nav:users'
+
 
 def year(request):
     """Возвращает год
@@ -15,22 +22,53 @@ def year(request):
     return {'year': year}
 
 
+def nav_groups():
+    """Возвращает самые крупные сообщества для меню из кэша"""
+    return cache.get_or_set(
+        NAV_GROUPS_KEY,
+        lambda: list(Group.objects.annotate(
+            posts_count=Count('post')
+        ).order_by('-posts_count', 'title').values(
+            'slug', 'title'
+        )[:settings.NAV_GROUPS_LIMIT]),
+        settings.NAV_CACHE_TIMEOUT,
+    )
+
+
+def nav_users():
+    """Возвращает самых активных авторов для меню из кэша"""
+    User = get_user_model()
+    return cache.get_or_set(
+        NAV_USERS_KEY,
+        lambda: list(User.objects.annotate(
+            posts_count=Count('post')
+        ).order_by('-posts_count', 'username').values(
+            'username'
+        )[:settings.NAV_USERS_LIMIT]),
+        settings.NAV_CACHE_TIMEOUT,
+    )
+
+
+def invalidate_nav():
+    """Сбрасывает кэш меню"""
+    cache.delete_many((NAV_GROUPS_KEY, NAV_USERS_KEY))
+
+
 def group(request):
-    """Возвращает год
+    """Возвращает сообщества для меню
 
         Ключевые аргументы:
-        year -- сегодняшняя дата в формате: год
+        group_button -- список сообществ, загружается только если
+        шаблон к нему обращается
         """
-    group_button = Group.objects.all()
-    return {'group_button': group_button}
+    return {'group_button': SimpleLazyObject(nav_groups)}
 
 
 def users(request):
-    """Возвращает год
+    """Возвращает пользователей для меню
 
         Ключевые аргументы:
-        year -- сегодняшняя дата в формате: год
+        user_button -- список пользователей, загружается только если
+        шаблон к нему обращается
         """
-    User = get_user_model()
-    user_button = User.objects.all()
-    return {'user_button': user_button}
+    return {'user_button': SimpleLazyObject(nav_users)}
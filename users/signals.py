@@ -0,0 +1,42 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from posts.models import Group, Post
+
+from .footer_year import invalidate_nav
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=User)
+def nav_changed(sender, **kwargs):
+    invalidate_nav()
+
+
+@receiver(post_save, sender=User)
+def nav_user_saved(sender, update_fields=None, **kwargs):
+    # Вход пользователя обновляет только last_login, меню от него
+    # не зависит.
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    invalidate_nav()
+
+
+@receiver(post_save, sender=Post)
+def nav_post_saved(sender, instance, created, raw=False, **kwargs):
+    # Меню упорядочено по числу постов: правка текста его не меняет,
+    # а новый пост или перенос в другое сообщество меняют.
+    if raw:
+        return
+    if created or getattr(
+        instance, '_previous_group_id', instance.group_id
+    ) != instance.group_id:
+        invalidate_nav()
+
+
+@receiver(post_delete, sender=Post)
+def nav_post_deleted(sender, **kwargs):
+    invalidate_nav()
@@ -0,0 +1,164 @@
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.contrib.staticfiles.views import serve as serve_found
+from django.core import checks
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (FileResponse, Http404, HttpResponse,
+                         HttpResponseNotModified)
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from django.views.static import was_modified_since
+
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+OFFLOAD_MODES = ('x-accel-redirect', 'x-sendfile')
+HASHED_NAME = re.compile(r'^(?P<name>.+)\.[0-9a-f]{12}(?P<ext>\.[^./]+)$')
+
+
+@checks.register
+def check_media_offload(app_configs, **kwargs):
+    """Проверяет MEDIA_OFFLOAD один раз при запуске, а не в запросе"""
+    offload = settings.MEDIA_OFFLOAD
+    if offload and offload not in OFFLOAD_MODES:
+        return [checks.Error(
+            f'Неизвестный MEDIA_OFFLOAD: {offload}',
+            hint='Допустимы x-accel-redirect, x-sendfile или пустая строка.',
+            id='yatube.E001',
+        )]
+    return []
+
+
+def _resolve(root, path):
+    try:
+        full_path = safe_join(root, posixpath.normpath(path).lstrip('/'))
+    except (SuspiciousFileOperation, ValueError):
+        raise Http404('Файл не найден')
+    if not os.path.isfile(full_path):
+        raise Http404('Файл не найден')
+    return full_path
+
+
+def _content_type(path):
+    content_type, _ = mimetypes.guess_type(path)
+    return content_type or 'application/octet-stream'
+
+
+def _variant(request, full_path):
+    accepted = {
+        part.split(';')[0].strip()
+        for part in request.META.get('HTTP_ACCEPT_ENCODING', '').split(',')
+    }
+    for encoding, suffix in ENCODINGS:
+        if encoding in accepted and os.path.isfile(full_path + suffix):
+            return full_path + suffix, encoding
+    return full_path, None
+
+
+def is_hashed(path):
+    """Возвращает True, если имя файла взято из манифеста статики
+
+        Такой файл никогда не меняется: новое содержимое получает
+        новое имя.
+
+        Ключевые аргументы:
+        path -- путь относительно STATIC_ROOT
+        """
+    match = HASHED_NAME.match(path)
+    manifest = getattr(staticfiles_storage, 'hashed_files', None)
+    if match is None or not manifest:
+        return False
+    return manifest.get(match['name'] + match['ext']) == path
+
+
+def _cache_headers(response, max_age, immutable):
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if immutable:
+        patch_cache_control(response, public=True, immutable=True)
+    patch_cache_control(response, public=True, max_age=max_age)
+    return response
+
+
+def _serve(request, root, path, max_age, immutable=False):
+    full_path = _resolve(root, path)
+    source, encoding = _variant(request, full_path)
+    stat = os.stat(source)
+    if not was_modified_since(
+        request.META.get('HTTP_IF_MODIFIED_SINCE'),
+        stat.st_mtime,
+        stat.st_size,
+    ):
+        # Без этих заголовков кэш продлил бы копию по своим правилам.
+        return _cache_headers(HttpResponseNotModified(), max_age, immutable)
+    response = FileResponse(
+        open(source, 'rb'),
+        content_type=_content_type(full_path),
+    )
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    if encoding is not None:
+        response['Content-Encoding'] = encoding
+    return _cache_headers(response, max_age, immutable)
+
+
+@require_safe
+def serve_static(request, path):
+    """Отдает статику, выбирая заранее сжатую копию по Accept-Encoding
+
+        Файлы с хешем в имени кэшируются браузером на STATIC_MAX_AGE
+        с immutable, остальные проверяются при каждом запросе.
+        В DEBUG файлы ищутся в приложениях без collectstatic.
+
+        Ключевые аргументы:
+        path -- путь относительно STATIC_URL
+        """
+    if settings.DEBUG and finders.find(path):
+        return serve_found(request, path, insecure=True)
+    if is_hashed(path):
+        return _serve(
+            request,
+            settings.STATIC_ROOT,
+            path,
+            settings.STATIC_MAX_AGE,
+            immutable=True,
+        )
+    return _serve(request, settings.STATIC_ROOT, path, 0)
+
+
+@require_safe
+def serve_media(request, path):
+    """Отдает загруженный файл через веб-сервер, если он настроен
+
+        При MEDIA_OFFLOAD = 'x-accel-redirect' nginx отдает файл
+        из внутреннего location MEDIA_ACCEL_PREFIX, при 'x-sendfile'
+        Apache или lighttpd читают файл по абсолютному пути. Python
+        только проверяет путь и ставит заголовки. Другие значения
+        отклоняет check_media_offload.
+
+        Ключевые аргументы:
+        path -- путь относительно MEDIA_URL
+        """
+    full_path = _resolve(settings.MEDIA_ROOT, path)
+    offload = settings.MEDIA_OFFLOAD
+    if offload not in OFFLOAD_MODES:
+        return _serve(
+            request,
+            settings.MEDIA_ROOT,
+            path,
+            settings.MEDIA_MAX_AGE,
+        )
+    response = HttpResponse(content_type=_content_type(full_path))
+    if offload == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = (
+            settings.MEDIA_ACCEL_PREFIX + quote(path)
+        )
+    else:
+        response['X-Sendfile'] = full_path
+    patch_cache_control(response, public=True, max_age=settings.MEDIA_MAX_AGE)
+    return response
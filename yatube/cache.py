@@ -0,0 +1,245 @@
+import hashlib
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+_MISSING = object()
+# Блокировки single-flight берутся по хешу ключа из фиксированного
+# набора, чтобы не хранить по блокировке на каждый ключ.
+FLIGHT_STRIPES = 64
+
+# Состояние общее для всех потоков процесса: django.core.cache.caches
+# создает отдельный экземпляр бэкенда на каждый поток.
+_entries = {}
+_locks = {}
+_flights = {}
+_stats = {}
+
+
+class TieredCache(BaseCache):
+    """Небольшой LRU-кэш процесса перед общим кэшем всех процессов
+
+        Значения живут в памяти процесса не дольше LOCAL_TIMEOUT секунд,
+        поэтому изменения из других процессов видны с этой задержкой.
+        get_or_set вычисляет отсутствующее значение один раз: внутри
+        процесса под блокировкой, между процессами под файлом-замком
+        в LOCK_DIR, остальные ждут результат. Файл создается с O_EXCL,
+        это атомарно, в отличие от add файлового кэша. Без LOCK_DIR
+        замком служит ключ в общем кэше, и его add должен быть
+        атомарным, как у LocMemCache или memcached.
+
+        Ключевые аргументы:
+        LOCATION -- имя общего кэша из CACHES
+        LOCAL_MAX_ENTRIES -- сколько значений держать в памяти процесса
+        LOCAL_TIMEOUT -- сколько секунд значение живет в памяти процесса
+        LOCK_DIR -- каталог файлов-замков, общий для всех процессов
+        LOCK_TIMEOUT -- через сколько секунд снимается забытый замок
+        LOCK_WAIT -- сколько секунд ждать чужого вычисления
+        """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._shared_alias = location
+        self._local_max_entries = options.get('LOCAL_MAX_ENTRIES', 1000)
+        self._local_timeout = options.get('LOCAL_TIMEOUT', 2)
+        self._lock_timeout = options.get('LOCK_TIMEOUT', 30)
+        self._lock_wait = options.get('LOCK_WAIT', 5)
+        self._lock_dir = options.get('LOCK_DIR')
+        if self._lock_dir is not None:
+            os.makedirs(self._lock_dir, exist_ok=True)
+        self._entries = _entries.setdefault(location, OrderedDict())
+        self._lock = _locks.setdefault(location, threading.Lock())
+        self._flights = _flights.setdefault(
+            location,
+            [threading.Lock() for _ in range(FLIGHT_STRIPES)],
+        )
+        self._stats = _stats.setdefault(location, Counter())
+
+    @property
+    def _shared(self):
+        return caches[self._shared_alias]
+
+    def _count(self, event):
+        with self._lock:
+            self._stats[event] += 1
+
+    def stats(self):
+        """Возвращает счетчики попаданий, промахов и пересчетов процесса"""
+        with self._lock:
+            return dict(self._stats)
+
+    def _remember(self, key, value, timeout=DEFAULT_TIMEOUT):
+        lifetime = self._local_timeout
+        if timeout is not DEFAULT_TIMEOUT and timeout is not None:
+            lifetime = min(lifetime, timeout)
+        if lifetime <= 0:
+            self._forget(key)
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + lifetime)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._local_max_entries:
+                self._entries.popitem(last=False)
+
+    def _forget(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def _local_get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            value, expires = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            self._stats['local_hits'] += 1
+            return value
+
+    def get(self, key, default=None, version=None):
+        made_key = self.make_key(key, version=version)
+        self.validate_key(made_key)
+        value = self._local_get(made_key)
+        if value is not _MISSING:
+            return value
+        value = self._shared.get(key, _MISSING, version=version)
+        if value is _MISSING:
+            self._count('misses')
+            return default
+        self._count('shared_hits')
+        self._remember(made_key, value)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        made_key = self.make_key(key, version=version)
+        self.validate_key(made_key)
+        self._shared.set(key, value, timeout, version=version)
+        self._remember(made_key, value, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        made_key = self.make_key(key, version=version)
+        self.validate_key(made_key)
+        added = self._shared.add(key, value, timeout, version=version)
+        if added:
+            self._remember(made_key, value, timeout)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        made_key = self.make_key(key, version=version)
+        self.validate_key(made_key)
+        self._forget(made_key)
+        self._shared.delete(key, version=version)
+
+    def has_key(self, key, version=None):
+        return self.get(key, _MISSING, version=version) is not _MISSING
+
+    def incr(self, key, delta=1, version=None):
+        made_key = self.make_key(key, version=version)
+        self.validate_key(made_key)
+        self._forget(made_key)
+        return self._shared.incr(key, delta, version=version)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        self._shared.clear()
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        value = self.get(key, _MISSING, version=version)
+        if value is not _MISSING:
+            return value
+        if not callable(default):
+            self.add(key, default, timeout, version=version)
+            return self.get(key, default, version=version)
+        made_key = self.make_key(key, version=version)
+        with self._flights[hash(made_key) % FLIGHT_STRIPES]:
+            # Пока ждали блокировку, значение мог вычислить другой поток.
+            value = self.get(key, _MISSING, version=version)
+            if value is not _MISSING:
+                return value
+            return self._compute_once(key, default, timeout, version)
+
+    def _lock_path(self, key, version):
+        made_key = self.make_key(key, version=version)
+        name = hashlib.md5(made_key.encode()).hexdigest()
+        return os.path.join(self._lock_dir, f'{name}.lock')
+
+    def _acquire(self, key, version):
+        """Возвращает True, если процесс взял замок вычисления ключа
+
+            Замок старше LOCK_TIMEOUT остался от упавшего процесса
+            и удаляется. Если такой замок одновременно заметят два
+            процесса, значение могут вычислить оба, но не больше.
+
+            Ключевые аргументы:
+            key -- ключ вычисляемого значения
+            version -- версия ключа
+            """
+        if self._lock_dir is None:
+            return self._shared.add(
+                f'{key}:lock', 1, self._lock_timeout, version=version
+            )
+        path = self._lock_path(key, version)
+        for _ in range(2):
+            try:
+                os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return True
+            except FileExistsError:
+                if not self._remove_stale(path):
+                    return False
+        return False
+
+    def _remove_stale(self, path):
+        try:
+            age = time.time() - os.path.getmtime(path)
+            if age < self._lock_timeout:
+                return False
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        return True
+
+    def _release(self, key, version):
+        if self._lock_dir is None:
+            self._shared.delete(f'{key}:lock', version=version)
+            return
+        try:
+            os.remove(self._lock_path(key, version))
+        except FileNotFoundError:
+            pass
+
+    def _compute_once(self, key, default, timeout, version):
+        owner = self._acquire(key, version)
+        if not owner:
+            value = self._wait(key, version)
+            if value is not _MISSING:
+                return value
+        try:
+            value = default()
+            self._count('recomputes')
+            self.set(key, value, timeout, version=version)
+            return value
+        finally:
+            if owner:
+                self._release(key, version)
+
+    def _wait(self, key, version):
+        deadline = time.monotonic() + self._lock_wait
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            value = self._shared.get(key, _MISSING, version=version)
+            if value is not _MISSING:
+                self._count('waits')
+                self._remember(self.make_key(key, version=version), value)
+                return value
+        return _MISSING
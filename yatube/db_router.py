@@ -0,0 +1,85 @@
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+PIN_COOKIE = 'primary_pin'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_local = threading.local()
+
+
+class ReplicaRouter:
+    """Отправляет чтение на реплики, запись на основную базу
+
+        Реплики используются только внутри запроса, отмеченного
+        ReplicaMiddleware. Команды, фоновые потоки и запросы после
+        недавней записи читают основную базу.
+        """
+
+    def db_for_read(self, model, **hints):
+        if not getattr(_local, 'use_replica', False):
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        # Дальнейшее чтение в этом запросе должно видеть запись.
+        _local.use_replica = False
+        _local.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+def is_pinned(request):
+    try:
+        until = float(request.COOKIES.get(PIN_COOKIE, 0))
+    except ValueError:
+        return False
+    return until > time.time()
+
+
+class ReplicaMiddleware:
+    """Разрешает чтение с реплик для безопасных запросов
+
+        После записи пользователь получает cookie и следующие
+        REPLICA_PIN_SECONDS секунд читает основную базу, поэтому
+        сразу видит свой пост, комментарий или подписку.
+        """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _local.use_replica = (
+            bool(settings.DATABASE_REPLICAS)
+            and request.method in SAFE_METHODS
+            and not is_pinned(request)
+        )
+        _local.wrote = False
+        try:
+            response = self.get_response(request)
+            wrote = _local.wrote
+        finally:
+            _local.use_replica = False
+            _local.wrote = False
+        if wrote and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                PIN_COOKIE,
+                str(time.time() + settings.REPLICA_PIN_SECONDS),
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
@@ -0,0 +1,259 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.http import HttpResponse
+from django.template import TemplateDoesNotExist
+from django.template.backends import django as django_backend
+from django.views.decorators.http import require_GET
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+UNRESOLVED = '<unresolved>'
+
+SECONDS_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+QUERIES_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+BYTES_BUCKETS = (
+    256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304,
+)
+
+_local = threading.local()
+
+
+def _escape(value):
+    return (str(value).replace('\\', '\\\\')
+            .replace('\n', '\\n').replace('"', '\\"'))
+
+
+def _labels(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"'
+             for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Счетчик с метками, общий для всех потоков процесса"""
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labels):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, *values, amount=1):
+        with self._lock:
+            self._values[values] = self._values.get(values, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield f'{self.name}{_labels(self.labels, key)} {_number(value)}'
+
+
+class Histogram(Counter):
+    """Гистограмма с фиксированными корзинами"""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels, buckets):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, *values, value):
+        # Корзина ищется до захвата блокировки, под ней только сложение.
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(values)
+            if series is None:
+                series = self._values[values] = [
+                    [0] * (len(self.buckets) + 1), 0, 0
+                ]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        with self._lock:
+            values = {key: ([*counts], total, count)
+                      for key, (counts, total, count)
+                      in self._values.items()}
+        bounds = self.buckets + (float('inf'),)
+        for key, (counts, total, count) in sorted(values.items()):
+            cumulative = 0
+            for bound, amount in zip(bounds, counts):
+                cumulative += amount
+                labels = _labels(self.labels, key, f'le="{_number(bound)}"')
+                yield f'{self.name}_bucket{labels} {cumulative}'
+            labels = _labels(self.labels, key)
+            yield f'{self.name}_sum{labels} {_number(total)}'
+            yield f'{self.name}_count{labels} {count}'
+
+
+REQUESTS = Counter(
+    'yatube_requests_total',
+    'Обработанные запросы',
+    ('view', 'method', 'status'),
+)
+LATENCY = Histogram(
+    'yatube_request_duration_seconds',
+    'Время обработки запроса',
+    ('view',),
+    SECONDS_BUCKETS,
+)
+QUERIES = Histogram(
+    'yatube_db_queries',
+    'Число запросов к базе за один запрос',
+    ('view',),
+    QUERIES_BUCKETS,
+)
+DB_TIME = Histogram(
+    'yatube_db_duration_seconds',
+    'Время запросов к базе за один запрос',
+    ('view',),
+    SECONDS_BUCKETS,
+)
+TEMPLATE_TIME = Histogram(
+    'yatube_template_duration_seconds',
+    'Время отрисовки шаблонов за один запрос',
+    ('view',),
+    SECONDS_BUCKETS,
+)
+RESPONSE_SIZE = Histogram(
+    'yatube_response_size_bytes',
+    'Размер тела ответа',
+    ('view',),
+    BYTES_BUCKETS,
+)
+REGISTRY = (REQUESTS, LATENCY, QUERIES, DB_TIME, TEMPLATE_TIME, RESPONSE_SIZE)
+
+
+def cache_samples():
+    name = 'yatube_cache_events_total'
+    yield f'# HELP {name} События кэша: попадания, промахи, пересчеты'
+    yield f'# TYPE {name} counter'
+    for alias in settings.CACHES:
+        stats = getattr(caches[alias], 'stats', None)
+        if stats is None:
+            continue
+        for event, value in sorted(stats().items()):
+            labels = _labels(('cache', 'event'), (alias, event))
+            yield f'{name}{labels} {value}'
+
+
+def render_metrics():
+    """Возвращает все метрики процесса в текстовом формате Prometheus"""
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        lines.extend(metric.samples())
+    lines.extend(cache_samples())
+    return '\n'.join(lines) + '\n'
+
+
+@require_GET
+def metrics(request):
+    return HttpResponse(render_metrics(), content_type=CONTENT_TYPE)
+
+
+class RequestStats:
+    __slots__ = ('queries', 'db_time', 'template_time', 'depth')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - started
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None or match.url_name is None:
+        return UNRESOLVED
+    return match.view_name
+
+
+class MetricsMiddleware:
+    """Собирает время ответа, запросы к базе, время шаблонов и размер
+    ответа по имени маршрута
+
+        Метрики хранятся в памяти процесса, при нескольких процессах
+        каждый отдает свои значения, а суммирует их Prometheus.
+        """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = _local.stats = RequestStats()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(stats))
+                response = self.get_response(request)
+        finally:
+            _local.stats = None
+        duration = time.perf_counter() - started
+        view = view_name(request)
+        REQUESTS.inc(view, request.method, response.status_code)
+        LATENCY.observe(view, value=duration)
+        QUERIES.observe(view, value=stats.queries)
+        DB_TIME.observe(view, value=stats.db_time)
+        TEMPLATE_TIME.observe(view, value=stats.template_time)
+        if not response.streaming:
+            RESPONSE_SIZE.observe(view, value=len(response.content))
+        return response
+
+
+class Template(django_backend.Template):
+    def render(self, context=None, request=None):
+        stats = getattr(_local, 'stats', None)
+        if stats is None:
+            return super().render(context, request)
+        # Вложенные render_to_string внутри шаблона не считаются дважды.
+        stats.depth += 1
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            stats.depth -= 1
+            if not stats.depth:
+                stats.template_time += time.perf_counter() - started
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """Стандартный движок шаблонов, замеряющий время отрисовки"""
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            django_backend.reraise(exc, self)
@@ -4,9 +4,53 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 SECRET_KEY = ')=m@5g(y^xv3*2x%#3eqjp0*+1$3%rrk0zgjy%_k$@w^vf=6wh'
 
-DEBUG = True
+DEBUG = os.environ.get('YATUBE_DEBUG', '1') == '1'
 
 PAGINATOR_PAGE = 10
+# Сколько комментариев показывать на странице поста и подгружать за раз
+COMMENTS_PAGE = 20
+
+# Меню: сколько сообществ и авторов показывать и сколько секунд кэшировать
+NAV_GROUPS_LIMIT = 20
+NAV_USERS_LIMIT = 20
+NAV_CACHE_TIMEOUT = 300
+
+# Сколько секунд хранить страницы лент для анонимных пользователей
+PAGE_CACHE_TIMEOUT = 600
+# Сколько секунд хранить пост для страницы поста
+POST_CACHE_TIMEOUT = 600
+
+# Рекомендации подписок: сколько хранить на пользователя и показывать
+SUGGESTIONS_STORED = 20
+SUGGESTIONS_SHOWN = 5
+
+# Популярное: за сколько секунд вклад события уменьшается вдвое, вес
+# событий, сколько постов показывать на /trending/ и в боковой панели
+TRENDING_HALF_LIFE = 24 * 60 * 60
+TRENDING_WEIGHTS = {'post': 1.0, 'comment': 2.0, 'follow': 3.0}
+TRENDING_LIMIT = 20
+TRENDING_SIDEBAR = 5
+
+# Миниатюры постов, должны совпадать с тегами thumbnail в шаблонах
+POST_THUMBNAILS = {
+    '960x339': {'crop': 'center', 'upscale': True},
+}
+# Создавать миниатюры в фоновом потоке после сохранения поста
+THUMBNAIL_WARM_ASYNC = True
+
+# Загруженные изображения: наибольшая сторона в пикселях, формат
+# (JPEG, WEBP или PNG) и качество сжатия
+POST_IMAGE_MAX_SIZE = 1920
+POST_IMAGE_FORMAT = 'WEBP'
+POST_IMAGE_QUALITY = 82
+
+# Поток новых постов: сколько секунд держать соединение, как часто
+# слать пустой комментарий, через сколько мс переподключаться
+# и сколько последних событий помнить для Last-Event-ID
+STREAM_TIMEOUT = 300
+STREAM_HEARTBEAT = 15
+STREAM_RETRY = 3000
+STREAM_BUFFER = 100
 
 ALLOWED_HOSTS = [
     'localhost',
@@ -19,6 +63,7 @@ INSTALLED_APPS = [
     'about',
     'users',
     'posts',
+    'api',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -29,6 +74,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yatube.metrics.MetricsMiddleware',
+    'yatube.db_router.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -42,7 +89,7 @@ ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'yatube.metrics.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -61,20 +108,86 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+# Тесты работают с отдельными кэшами в памяти, см. yatube.testing
+TEST_RUNNER = 'yatube.testing.IsolatedCachesRunner'
+
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'yatube.sqlite_backend',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Соединение живет между запросами, а не открывается заново
+        'CONN_MAX_AGE': int(os.environ.get('YATUBE_CONN_MAX_AGE', 60)),
+        'OPTIONS': {'transaction_mode': 'IMMEDIATE'},
     }
 }
 
+# PRAGMA для каждого нового соединения с SQLite. Пустой словарь
+# возвращает настройки SQLite по умолчанию.
+SQLITE_PRAGMAS = {
+    # Ждать снятия блокировки вместо ошибки database is locked
+    'busy_timeout': 5000,
+    # Читатели не блокируют писателя и наоборот
+    'journal_mode': 'WAL',
+    # В режиме WAL fsync только при контрольной точке
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение задает размер кэша страниц в КиБ
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+# Реплики только для чтения. Для проверки на локальной машине подойдут
+# копии базы SQLite из команды sync_replicas:
+# YATUBE_REPLICAS=/tmp/replica1.sqlite3,/tmp/replica2.sqlite3
+DATABASE_REPLICAS = []
+for number, path in enumerate(
+    filter(None, os.environ.get('YATUBE_REPLICAS', '').split(',')), 1
+):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+
+DATABASE_ROUTERS = ['yatube.db_router.ReplicaRouter']
+# Сколько секунд после записи пользователь читает основную базу
+REPLICA_PIN_SECONDS = 5
+
+# Кэш процесса перед общим файловым кэшем всех процессов на машине
+CACHE_DIR = os.environ.get(
+    'YATUBE_CACHE_DIR',
+    os.path.join(BASE_DIR, '.cache'),
+)
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+        'BACKEND': 'yatube.cache.TieredCache',
+        'LOCATION': 'shared',
+        'OPTIONS': {
+            'LOCAL_MAX_ENTRIES': 1000,
+            'LOCAL_TIMEOUT': 2,
+            'LOCK_DIR': os.path.join(CACHE_DIR, 'locks'),
+        },
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(CACHE_DIR, 'shared'),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    # Отдельно от страниц, чтобы их вытеснение не выбрасывало сессии.
+    # Без кэша процесса: выход из аккаунта сразу виден всем процессам.
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(CACHE_DIR, 'sessions'),
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
 }
 
+# Сессии читаются из кэша, а записываются и в кэш, и в базу
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'sessions'
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -115,6 +228,22 @@ STATIC_URL = '/static/'
 
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 
+# Исходники статики проекта, collectstatic собирает их в STATIC_ROOT
+ASSETS_DIR = os.path.join(BASE_DIR, 'assets')
+STATICFILES_DIRS = [ASSETS_DIR] if os.path.isdir(ASSETS_DIR) else []
+
+# Вне DEBUG имена файлов статики содержат хеш содержимого, а рядом
+# лежат сжатые .gz и .br, поэтому браузер кэширует их навсегда
+if not DEBUG:
+    STATICFILES_STORAGE = 'yatube.storage.CompressedManifestStaticFilesStorage'
+STATIC_MAX_AGE = 365 * 24 * 60 * 60
+
 MEDIA_URL = '/media/'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Кто отдает загруженные файлы: '' — Django, 'x-accel-redirect' — nginx
+# из внутреннего location MEDIA_ACCEL_PREFIX, 'x-sendfile' — Apache
+MEDIA_OFFLOAD = os.environ.get('YATUBE_MEDIA_OFFLOAD', '')
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+MEDIA_MAX_AGE = 24 * 60 * 60
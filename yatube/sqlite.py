@@ -0,0 +1,14 @@
+from django.conf import settings
+
+
+def apply_pragmas(connection):
+    """Настраивает новое соединение с SQLite по SQLITE_PRAGMAS
+
+        Ключевые аргументы:
+        connection -- обертка соединения Django из connection_created
+        """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
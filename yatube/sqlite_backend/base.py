@@ -0,0 +1,23 @@
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """Бэкенд SQLite с выбором режима начала транзакции
+
+        OPTIONS['transaction_mode'] = 'IMMEDIATE' берет блокировку записи
+        в начале atomic. Иначе транзакция, которая сначала читает,
+        а потом пишет, получает database is locked сразу, не дожидаясь
+        busy_timeout.
+        """
+    transaction_mode = None
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.transaction_mode = params.pop('transaction_mode', None)
+        return params
+
+    def _start_transaction_under_autocommit(self):
+        if self.transaction_mode is None:
+            super()._start_transaction_under_autocommit()
+        else:
+            self.cursor().execute(f'BEGIN {self.transaction_mode}')
@@ -0,0 +1,60 @@
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = (
+    '.css', '.js', '.map', '.svg', '.json', '.txt', '.xml', '.html',
+    '.ico', '.ttf', '.eot',
+)
+# Меньшие файлы после сжатия почти не уменьшаются.
+MIN_SIZE = 256
+
+
+def compressors():
+    """Возвращает пары (суффикс, функция сжатия) для доступных форматов"""
+    result = [('.gz', lambda data: gzip.compress(data, 9, mtime=0))]
+    if brotli is not None:
+        result.append(('.br', lambda data: brotli.compress(data, quality=11)))
+    return result
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Статика с хешем содержимого в имени и заранее сжатыми копиями
+
+        collectstatic после переименования кладет рядом с каждым
+        текстовым файлом .gz и, если установлен пакет brotli, .br.
+        Веб-сервер отдает их без сжатия на лету: nginx с gzip_static
+        и brotli_static или yatube.assets.serve_static.
+        """
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            for compressed in self.compress(name):
+                yield name, compressed, True
+
+    def compress(self, name):
+        if not name.endswith(COMPRESSIBLE):
+            return
+        with self.open(name) as source:
+            data = source.read()
+        if len(data) < MIN_SIZE:
+            return
+        for suffix, compress in compressors():
+            content = compress(data)
+            if len(content) >= len(data):
+                continue
+            target = name + suffix
+            if self.exists(target):
+                self.delete(target)
+            self._save(target, ContentFile(content))
+            yield target
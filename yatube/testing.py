@@ -0,0 +1,44 @@
+import uuid
+
+from django.conf import settings
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+# Общие между процессами кэши страниц и сессий, в тестах — в памяти.
+ISOLATED_ALIASES = ('shared', 'sessions')
+
+
+def isolated_caches():
+    """Возвращает CACHES, где общие кэши заменены кэшем в памяти
+
+        Файловые кэши лежат в общем каталоге: тесты не должны ни
+        очищать кэш запущенного рядом сервера, ни видеть версии
+        страниц и замки, оставшиеся от прошлых запусков.
+        """
+    caches = {alias: dict(params) for alias, params in settings.CACHES.items()}
+    run = uuid.uuid4().hex
+    for params in caches.values():
+        # Замки вычислений берутся в изолированном общем кэше.
+        params['OPTIONS'] = {
+            name: value for name, value in params.get('OPTIONS', {}).items()
+            if name != 'LOCK_DIR'
+        }
+    for alias in ISOLATED_ALIASES:
+        caches[alias] = {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': f'yatube-test-{alias}-{run}',
+        }
+    return caches
+
+
+class IsolatedCachesRunner(DiscoverRunner):
+    """Запускает тесты manage.py test с кэшами из isolated_caches"""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._caches = override_settings(CACHES=isolated_caches())
+        self._caches.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._caches.disable()
+        super().teardown_test_environment(**kwargs)
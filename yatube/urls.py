@@ -1,12 +1,29 @@
+import re
+
+from django.conf import settings
 from django.conf.urls import handler404, handler500
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
+
+from . import assets, metrics
 
 handler404 = 'posts.views.page_not_found'
 handler500 = 'posts.views.server_error'
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/', include('api.urls', namespace='api')),
+    path('metrics', metrics.metrics, name='metrics'),
+    re_path(
+        r'^{}(?P<path>.+)$'.format(re.escape(settings.STATIC_URL[1:])),
+        assets.serve_static,
+        name='static_file'
+    ),
+    re_path(
+        r'^{}(?P<path>.+)$'.format(re.escape(settings.MEDIA_URL[1:])),
+        assets.serve_media,
+        name='media_file'
+    ),
     path('', include('posts.urls')),
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),